@@ -1,12 +1,14 @@
-import sys
 import numpy as np
 import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
 from tkinter import ttk, messagebox
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from shapely.affinity import scale
-from gear import generate  # Assuming gear_generator.py contains the gear generation function
-import pyperclip
+from cache import LRUCache
+
+DEBOUNCE_MS = 150  # Quiet time after the last parameter change before generating
+POLL_MS = 30  # Interval at which the main thread checks for a finished gear
 
 class GearGeneratorApp:
     def __init__(self, root):
@@ -21,8 +23,19 @@ class GearGeneratorApp:
         self.backlash = tk.DoubleVar(value=0.1)
         self.profile_shift = tk.DoubleVar(value=0.0)
         self.clearance_factor = tk.DoubleVar(value=0.167)
+        self.gear_cache = LRUCache(maxsize=64)
+
+        # Gears are generated on a single worker thread, which is also the only
+        # user of gear_cache. Results are picked up on the Tk thread by polling
+        # with root.after, and dropped when the parameters changed meanwhile.
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="gear")
+        self.job = None  # Future of the latest generation
+        self.job_token = 0  # Incremented by every request, identifies the latest one
+        self.pending_update = None  # after() id of the debounced update
 
         self.create_ui()
+        for var in (self.teeth_count, self.module, self.pressure_angle, self.backlash, self.profile_shift, self.clearance_factor):
+            var.trace_add("write", self.schedule_update)  # Sliders and entries
         self.update_gear()
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)  # Handle graceful exit
     
@@ -55,7 +68,8 @@ class GearGeneratorApp:
             self.sliders.append(slider)
             
         # Gear Visualization Frame
-        self.fig, self.ax = plt.subplots(figsize=(4, 4))
+        self.fig = Figure(figsize=(4, 4))
+        self.ax = self.fig.add_subplot()
         self.canvas = FigureCanvasTkAgg(self.fig, master=self.root)
         self.canvas.get_tk_widget().pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         
@@ -75,16 +89,80 @@ class GearGeneratorApp:
         # Update Button
         self.update_button = tk.Button(control_frame, text="Update Gear", command=self.update_gear)
         self.update_button.grid(row=len(parameters)+1, column=0, columnspan=3, pady=10)
+
+        # Busy Indicator
+        self.status = tk.StringVar()
+        tk.Label(control_frame, textvariable=self.status, anchor=tk.W, width=40).grid(row=len(parameters)+2, column=0, columnspan=2, sticky=tk.W)
+        self.progress = ttk.Progressbar(control_frame, mode="indeterminate", length=200)
+        self.progress.grid(row=len(parameters)+2, column=2, padx=5)
         
+    def schedule_update(self, *args):
+        """Restarts the debounce delay, so that dragging a slider generates a single gear once it rests."""
+        if self.pending_update is not None:
+            self.root.after_cancel(self.pending_update)
+        self.pending_update = self.root.after(DEBOUNCE_MS, self.update_gear)
+
+    def read_params(self):
+        """Returns the current parameters, raising tk.TclError while an entry holds no number."""
+        return {
+            "teeth_count": self.teeth_count.get(),
+            "module": self.module.get(),
+            "pressure_angle": self.pressure_angle.get(),
+            "backlash": self.backlash.get(),
+            "profile_shift": self.profile_shift.get(),
+            "clearance_factor": self.clearance_factor.get(),
+        }
+
+    def set_busy(self, busy, message=""):
+        """Shows or hides the busy indicator."""
+        self.status.set(message)
+        if busy:
+            self.progress.start(10)
+        else:
+            self.progress.stop()
+        self.canvas.get_tk_widget().config(cursor="watch" if busy else "")
+
     def update_gear(self):
-        self.ax.clear()
-        
-        # Generate Gear
-        gear, pitch_radius = generate(
-            self.teeth_count.get(), self.module.get(), np.radians(self.pressure_angle.get()),
-            self.backlash.get(), 16, self.profile_shift.get(), self.clearance_factor.get()
+        """Starts generating the gear of the current parameters in the background."""
+        if self.pending_update is not None:
+            self.root.after_cancel(self.pending_update)
+            self.pending_update = None
+        try:
+            params = self.read_params()
+        except tk.TclError:
+            self.set_busy(False, "Invalid parameter value")
+            return
+
+        # A newer request supersedes the previous one: drop it if it has not started
+        # yet, otherwise its result is ignored when it arrives
+        if self.job is not None:
+            self.job.cancel()
+        self.job_token += 1
+        self.job = self.executor.submit(
+            self.gear_cache.generate, params["teeth_count"], params["module"], np.radians(params["pressure_angle"]),
+            params["backlash"], 16, params["profile_shift"], params["clearance_factor"]
         )
-        
+        self.set_busy(True, "Generating...")
+        self.root.after(POLL_MS, self.poll_gear, self.job, self.job_token, params)
+
+    def poll_gear(self, job, token, params):
+        """Waits on the Tk thread for a generation to finish, without blocking the event loop."""
+        if token != self.job_token:
+            return  # Stale: parameters changed since, a newer request is polled
+        if not job.done():
+            self.root.after(POLL_MS, self.poll_gear, job, token, params)
+            return
+        try:
+            gear, pitch_radius = job.result()
+        except Exception as e:
+            self.set_busy(False, f"Error: {e}")
+            return
+        self.set_busy(False)
+        self.show_gear(gear, pitch_radius, params)
+
+    def show_gear(self, gear, pitch_radius, params):
+        """Draws a generated gear and fills the data table and CLI command with its parameters."""
+        self.ax.clear()
         scaled_gear = scale(gear, xfact=1, yfact=1, origin=(0, 0))
         x, y = scaled_gear.exterior.xy
         self.ax.plot(x, y, "b-")
@@ -92,17 +170,17 @@ class GearGeneratorApp:
         self.ax.set_xlim(-pitch_radius * 1.2, pitch_radius * 1.2)
         self.ax.set_ylim(-pitch_radius * 1.2, pitch_radius * 1.2)
         self.ax.set_aspect("equal")
-        self.canvas.draw()
+        self.canvas.draw_idle()
 
         # Update Data Table
         self.data_frame.delete(*self.data_frame.get_children())
         gear_data = [
-            ("Teeth Count", self.teeth_count.get()),
-            ("Module (mm per tooth)", self.module.get()),
-            ("Pressure Angle (deg)", self.pressure_angle.get()),
-            ("Backlash (mm)", self.backlash.get()),
-            ("Profile Shift", self.profile_shift.get()),
-            ("Clearance Factor", self.clearance_factor.get()),
+            ("Teeth Count", params["teeth_count"]),
+            ("Module (mm per tooth)", params["module"]),
+            ("Pressure Angle (deg)", params["pressure_angle"]),
+            ("Backlash (mm)", params["backlash"]),
+            ("Profile Shift", params["profile_shift"]),
+            ("Clearance Factor", params["clearance_factor"]),
             ("Pitch Radius (mm)", pitch_radius)
         ]
         for param, value in gear_data:
@@ -110,17 +188,22 @@ class GearGeneratorApp:
         
         # Generate CLI Command (copy paste this in your IDE while being in the same directory to generate a DXF of the Gear)
         self.cli_command.set(
-            f"python gear.py -c {self.teeth_count.get()} -m {self.module.get()} "
-            f"-p {self.pressure_angle.get()} -b {self.backlash.get()} "
-            f"-x {self.profile_shift.get()} -cf {self.clearance_factor.get()} -n 16 "
+            f"python gear.py -c {params['teeth_count']} -m {params['module']} "
+            f"-p {params['pressure_angle']} -b {params['backlash']} "
+            f"-x {params['profile_shift']} -cf {params['clearance_factor']} -n 16 "
             f"-t dxf -o generated_gear.dxf"
         )
     
     def copy_command(self):
+        import pyperclip  # only needed when copying
         pyperclip.copy(self.cli_command.get())
         messagebox.showinfo("CLI Command", "Copied to clipboard!")
     
     def on_closing(self):
+        if self.pending_update is not None:
+            self.root.after_cancel(self.pending_update)
+        self.job_token += 1  # Ends polling
+        self.executor.shutdown(wait=False, cancel_futures=True)
         self.root.quit()
         self.root.destroy()
 
@@ -0,0 +1,55 @@
+import numpy as np
+import shapely
+from shapely.geometry import Polygon
+
+# File layout, little-endian:
+# - 8 bytes magic, uint32 format version, uint32 ring count R
+# - (R + 1) uint64 ring offsets, counted in vertices
+# - float64 (x, y) pairs of all rings, exterior first, each ring closed
+MAGIC = b'GEARGEOM'
+VERSION = 1
+HEADER = np.dtype([('magic', 'S8'), ('version', '<u4'), ('rings', '<u4')])
+
+
+def write(out, geom):
+	"""
+	Writes the rings of a polygon as raw float64 arrays, after a small header
+	and the ring offsets. out must be opened in binary mode.
+	"""
+	rings = [geom.exterior] + list(geom.interiors)
+	coords = [shapely.get_coordinates(ring) for ring in rings]
+	offsets = np.cumsum([0] + [len(c) for c in coords], dtype='<u8')
+
+	header = np.array([(MAGIC, VERSION, len(rings))], dtype=HEADER)
+	out.write(header.tobytes())
+	out.write(offsets.tobytes())
+	out.write(np.concatenate(coords).astype('<f8').tobytes())
+
+
+def read(path, mmap=True):
+	"""
+	Reads a file written by write() and returns its rings as a list of (N, 2)
+	float64 arrays, exterior first. With mmap, the arrays are views into a
+	read-only numpy.memmap of the file: nothing is copied or parsed until the
+	coordinates are accessed.
+	"""
+	header = np.fromfile(path, dtype=HEADER, count=1)
+	if len(header) == 0 or header['magic'][0] != MAGIC:
+		raise ValueError("not a binary gear file: %r" % path)
+	if header['version'][0] != VERSION:
+		raise ValueError("unsupported binary gear version %d: %r" % (header['version'][0], path))
+	ring_count = int(header['rings'][0])
+
+	offsets = np.fromfile(path, dtype='<u8', count=ring_count + 1, offset=HEADER.itemsize)
+	start = HEADER.itemsize + offsets.nbytes
+	if mmap:
+		coords = np.memmap(path, dtype='<f8', mode='r', offset=start, shape=(int(offsets[-1]), 2))
+	else:
+		coords = np.fromfile(path, dtype='<f8', offset=start).reshape(-1, 2)
+	return [coords[offsets[i]:offsets[i + 1]] for i in range(ring_count)]
+
+
+def read_polygon(path):
+	"""Reads a file written by write() back as a shapely Polygon."""
+	rings = read(path, mmap=False)
+	return Polygon(rings[0], rings[1:])
@@ -1,8 +1,67 @@
 import itertools
 
+import numpy as np
+import shapely
 
+from backends.fitting import fit_ring, bulge_arcs
+from backends.formatting import write_rows
 
-def write(out, geom):
+
+def write(out, geom, version='R2000', precision=6, tolerance=None):
+	"""
+	Writes the rings of a polygon as a DXF drawing.
+
+	version 'R2000' writes every ring as one closed LWPOLYLINE; 'R12' writes
+	one LINE entity per edge, for software that only reads R12 files.
+	Coordinates are written with the given number of decimals.
+
+	With a tolerance, runs of vertices are replaced by lines and circular arcs
+	fitted within that distance: arcs become LWPOLYLINE bulges in R2000 and
+	ARC entities in R12.
+	"""
+	if version == 'R2000':
+		write_r2000(out, geom, precision, tolerance)
+	elif version == 'R12':
+		write_r12(out, geom, precision, tolerance)
+	else:
+		raise ValueError("unknown DXF version: %r" % version)
+
+
+def write_r2000(out, geom, precision=6, tolerance=None):
+	rings = list(itertools.chain([geom.exterior], geom.interiors))
+
+	# Generate the header
+	out.write(' 0\nSECTION\n 2\nHEADER\n')
+	out.write(' 9\n$ACADVER\n 1\nAC1015\n')
+	out.write(' 9\n$HANDSEED\n 5\n%X\n' % (0x100 + len(rings)))
+	out.write(' 0\nENDSEC\n')
+
+	# Layer "1", as used by the R12 writer
+	out.write(' 0\nSECTION\n 2\nTABLES\n')
+	out.write(' 0\nTABLE\n 2\nLAYER\n 5\n2\n100\nAcDbSymbolTable\n 70\n1\n')
+	out.write(' 0\nLAYER\n 5\n10\n100\nAcDbSymbolTableRecord\n100\nAcDbLayerTableRecord\n')
+	out.write(' 2\n1\n 70\n0\n 62\n1\n 6\nCONTINUOUS\n')
+	out.write(' 0\nENDTAB\n 0\nENDSEC\n')
+
+	# One closed polyline per ring
+	out.write(' 0\nSECTION\n 2\nENTITIES\n')
+	for handle, ring in enumerate(rings, 0x100):
+		coords = shapely.get_coordinates(ring)[:-1]
+		out.write(' 0\nLWPOLYLINE\n 5\n%X\n100\nAcDbEntity\n 8\n1\n 62\n1\n' % handle)
+		if tolerance is None:
+			out.write('100\nAcDbPolyline\n 90\n%d\n 70\n1\n' % len(coords))
+			write_rows(out, coords, ' 10\n%.{0}f\n 20\n%.{0}f\n'.format(precision))
+		else:
+			vertices, bulges = fit_ring(coords, tolerance)
+			out.write('100\nAcDbPolyline\n 90\n%d\n 70\n1\n' % len(vertices))
+			write_rows(out, np.column_stack([vertices, bulges]), ' 10\n%.{0}f\n 20\n%.{0}f\n 42\n%.12g\n'.format(precision))
+	out.write(' 0\nENDSEC\n')
+
+	# Generate the footer
+	out.write(' 0\nEOF\n')
+
+
+def write_r12(out, geom, precision=6, tolerance=None):
 	# Generate the header
 	out.write(' 999\n')
 	out.write('DXF created from gear.py\n')
@@ -46,19 +105,19 @@ def write(out, geom):
 	out.write(' 2\n')
 	out.write('ENTITIES\n')
 
+	line = ' 0\nLINE\n 8\n1\n 62\n1\n 10\n%.{0}f\n 20\n%.{0}f\n 11\n%.{0}f\n 21\n%.{0}f\n'.format(precision)
+	arc = ' 0\nARC\n 8\n1\n 62\n1\n 10\n%.{0}f\n 20\n%.{0}f\n 40\n%.{0}f\n 50\n%.{0}f\n 51\n%.{0}f\n'.format(precision)
 	for ring in itertools.chain.from_iterable([[geom.exterior], geom.interiors]):
-		for vertex_pair in zip(ring.coords[:-1], ring.coords[1:]):
-			out.write(' 0\n')
-			out.write('LINE\n')
-			out.write(' 8\n')
-			out.write('1\n')
-			out.write(' 62\n')
-			out.write('1\n')
-			for i, (x, y) in enumerate(vertex_pair):
-				out.write(' %d\n' % (10 + i))
-				out.write('%f\n' % x)
-				out.write(' %d\n' % (20 + i))
-				out.write('%f\n' % y)
+		coords = shapely.get_coordinates(ring)
+		if tolerance is None:
+			write_rows(out, np.hstack([coords[:-1], coords[1:]]), line)
+			continue
+		vertices, bulges = fit_ring(coords, tolerance)
+		starts, ends = vertices, np.roll(vertices, -1, axis=0)
+		straight = bulges == 0
+		write_rows(out, np.hstack([starts[straight], ends[straight]]), line)
+		center, radius, start_angle, end_angle = bulge_arcs(starts[~straight], ends[~straight], bulges[~straight])
+		write_rows(out, np.column_stack([center, radius, start_angle, end_angle]), arc)
 
 	out.write(' 0\n')
 	out.write('ENDSEC\n')
@@ -0,0 +1,111 @@
+import numpy as np
+
+
+def arc_bulge(run, tolerance, max_step=np.pi / 16):
+	"""
+	Tries to replace a run of vertices by a single line or circular arc from
+	its first to its last vertex, every vertex staying within tolerance.
+	Returns the DXF bulge of the fitted segment (0 for a line, tan(sweep / 4)
+	for an arc, positive counter-clockwise), or None when neither fits.
+	"""
+	start, end = run[0], run[-1]
+	chord = end - start
+	length = np.hypot(*chord)
+	offsets = run - start
+	if length > 0 and np.abs(chord[0] * offsets[:, 1] - chord[1] * offsets[:, 0]).max() <= tolerance * length:
+		return 0.0
+
+	# Circle through both ends and the middle vertex
+	middle = run[len(run) // 2] - start
+	d = 2.0 * (chord[0] * middle[1] - chord[1] * middle[0])
+	if d == 0.0:
+		return None
+	c2, m2 = chord @ chord, middle @ middle
+	center = start + np.array([middle[1] * c2 - chord[1] * m2, chord[0] * m2 - middle[0] * c2]) / d
+	radius = np.hypot(*(start - center))
+	if np.abs(np.hypot(*(run - center).T) - radius).max() > tolerance:
+		return None
+
+	# The edges between the vertices must stay within tolerance as well: the
+	# circle passes exactly through three vertices, so a corner between them
+	# would otherwise be rounded off. The distance to the centre along an
+	# edge is smallest at the foot of the perpendicular from the centre.
+	edges = np.diff(run, axis=0)
+	lengths = (edges ** 2).sum(axis=1)
+	t = np.clip(((center - run[:-1]) * edges).sum(axis=1) / np.where(lengths > 0, lengths, 1.0), 0.0, 1.0)
+	nearest = np.hypot(*(run[:-1] + t[:, None] * edges - center).T)
+	if np.abs(radius - nearest).max() > tolerance:
+		return None
+
+	# The vertices must run along the arc in one direction, in steps small
+	# enough for a single arc
+	angles = np.unwrap(np.arctan2(run[:, 1] - center[1], run[:, 0] - center[0]))
+	steps = np.diff(angles)
+	if not ((steps > 0).all() or (steps < 0).all()) or np.abs(steps).max() > max_step:
+		return None
+	if abs(angles[-1] - angles[0]) > np.pi:
+		return None
+	return np.tan((angles[-1] - angles[0]) / 4.0)
+
+
+def fit_ring(coords, tolerance):
+	"""
+	Fits lines and circular arcs to a closed ring, greedily extending each
+	segment as far as it stays within tolerance of the original vertices.
+	Circular runs such as the tip and root lands collapse to a single arc.
+
+	Returns the (M, 2) segment start vertices and the (M,) bulges of the
+	segments, the last one closing back to the first vertex.
+	"""
+	points = np.asarray(coords, dtype=float)
+	if (points[0] == points[-1]).all():
+		points = points[:-1]
+	n = len(points)
+
+	# Start at the sharpest corner, so that no smooth run is split at the seam
+	incoming = points - np.roll(points, 1, axis=0)
+	outgoing = np.roll(points, -1, axis=0) - points
+	turn = np.abs(np.arctan2(incoming[:, 0] * outgoing[:, 1] - incoming[:, 1] * outgoing[:, 0], (incoming * outgoing).sum(axis=1)))
+	points = np.roll(points, -int(np.argmax(turn)), axis=0)
+	points = np.vstack([points, points[:1]])
+
+	vertices, bulges = [], []
+	i = 0
+	while i < n:
+		# Grow the segment exponentially, then bisect between the last fit and the first miss
+		good, bulge, step, miss = i + 1, 0.0, 2, None
+		while good < n:
+			j = min(i + step, n)
+			fitted = arc_bulge(points[i:j + 1], tolerance)
+			if fitted is None:
+				miss = j
+				break
+			good, bulge, step = j, fitted, step * 2
+		while miss is not None and miss - good > 1:
+			j = (good + miss) // 2
+			fitted = arc_bulge(points[i:j + 1], tolerance)
+			if fitted is None:
+				miss = j
+			else:
+				good, bulge = j, fitted
+		vertices.append(points[i])
+		bulges.append(bulge)
+		i = good
+	return np.array(vertices), np.array(bulges)
+
+
+def bulge_arcs(start, end, bulge):
+	"""
+	Converts arc segments given by their ends and bulges to circles.
+	Returns the centres, radii and the counter-clockwise start and end angles
+	in degrees, as used by DXF ARC entities.
+	"""
+	chord = end - start
+	normal = np.stack([-chord[:, 1], chord[:, 0]], axis=1)
+	center = (start + end) / 2 + normal * ((1 - bulge ** 2) / (4 * bulge))[:, None]
+	radius = np.hypot(*(start - center).T)
+	first = np.where(bulge > 0, 0, 1)[:, None]
+	ends = np.stack([start, end], axis=1)
+	a = np.take_along_axis(ends, first[:, :, None], axis=1)[:, 0] - center
+	b = np.take_along_axis(ends, 1 - first[:, :, None], axis=1)[:, 0] - center
+	return center, radius, np.degrees(np.arctan2(a[:, 1], a[:, 0])), np.degrees(np.arctan2(b[:, 1], b[:, 0]))
@@ -0,0 +1,13 @@
+import numpy as np
+
+
+def write_rows(out, rows, template, chunk=32768):
+	"""
+	Writes an (N, K) float array through a %-format template holding K
+	conversions, one row per template. Rows are formatted chunk at a time with
+	a single string operation instead of one formatting call per value.
+	"""
+	rows = np.asarray(rows, dtype=float)
+	for start in range(0, len(rows), chunk):
+		block = rows[start:start + chunk]
+		out.write((template * len(block)) % tuple(block.ravel().tolist()))
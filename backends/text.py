@@ -1,5 +1,9 @@
-def write(out, geom):
+import shapely
+
+from backends.formatting import write_rows
+
+
+def write(out, geom, precision=6):
 	ring_list = [geom.exterior] + list(geom.interiors)
 	for ring in ring_list:
-		for x, y in ring.coords:
-			out.write('%f %f\n' % (x, y))
\ No newline at end of file
+		write_rows(out, shapely.get_coordinates(ring), '%.{0}f %.{0}f\n'.format(precision))
@@ -0,0 +1,39 @@
+"""Compares the 'loop' and 'sector' gear constructions over a range of teeth counts."""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gear import generate, deg2rad
+
+
+def time_generate(repeat, **kwargs):
+    """Returns the best wall time of several generate() calls."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        generate(**kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark gear construction modes.")
+    parser.add_argument('-c', '--teeth-counts', type=int, nargs='+', default=[8, 20, 50, 100, 200, 400], help="Teeth counts to time")
+    parser.add_argument('-n', '--frame-count', type=int, default=16, help="Number of frames for interpolation")
+    parser.add_argument('-r', '--repeat', type=int, default=3, help="Repetitions per measurement")
+    args = parser.parse_args()
+
+    print(f"{'teeth':>6} {'loop [ms]':>10} {'sector [ms]':>12} {'speedup':>8}")
+    for teeth_count in args.teeth_counts:
+        params = dict(teeth_count=teeth_count, module=2.0, pressure_angle=deg2rad(20.0), backlash=0.1,
+                      frame_count=args.frame_count, profile_shift=0.0, clearance_factor=0.167)
+        loop = time_generate(args.repeat, construction='loop', **params)
+        sector = time_generate(args.repeat, construction='sector', **params)
+        print(f"{teeth_count:>6} {loop * 1e3:>10.2f} {sector * 1e3:>12.2f} {loop / sector:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
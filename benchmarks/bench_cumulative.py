@@ -0,0 +1,79 @@
+"""
+Compares ways of producing the cut state after every frame of the cutting
+sweep, and the final cut alone.
+
+The cut gains a few vertices per frame, so materializing every state costs
+at least the sum of their sizes, quadratic in the frame count: the streamed
+states match a running union, while the final cut alone is merged
+hierarchically in near-linear time.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import shapely
+
+from gear import UnionAccumulator, iter_cutting_frames
+
+
+def recompute(hulls):
+    """Unions the whole prefix again for every frame."""
+    for k in range(1, len(hulls) + 1):
+        shapely.union_all(hulls[:k])
+
+
+def running(hulls):
+    """Merges every new hull into the envelope so far."""
+    cut = hulls[0]
+    for hull in hulls[1:]:
+        cut = shapely.union(cut, hull)
+
+
+def streamed(spec):
+    """Streams the sweep with cumulative state, reading the cut of every frame."""
+    for frame in iter_cutting_frames(spec, cumulative=True):
+        frame.cut
+
+
+def final(hulls):
+    """Merges every hull once with the hierarchical accumulator."""
+    accumulator = UnionAccumulator()
+    for hull in hulls:
+        accumulator.add(hull)
+    accumulator.union()
+
+
+def best_time(repeat, func, *args):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-frame cumulative cut states.")
+    parser.add_argument('-n', '--frame-counts', type=int, nargs='+', default=[100, 400, 1600, 6400], help="Frame counts to time")
+    parser.add_argument('-c', '--teeth-count', type=int, default=20, help="Number of teeth")
+    parser.add_argument('--recompute-limit', type=int, default=400, help="Largest frame count timed with full recomputation")
+    parser.add_argument('-r', '--repeat', type=int, default=3, help="Repetitions per measurement")
+    args = parser.parse_args()
+
+    print(f"{'frames':>7} {'recompute [ms]':>15} {'running [ms]':>13} {'streamed [ms]':>14} {'final only [ms]':>16} {'vertices':>9}")
+    for frame_count in args.frame_counts:
+        spec = {'teeth_count': args.teeth_count, 'frame_count': frame_count}
+        hulls = [frame.hull for frame in iter_cutting_frames(spec)]
+        full = f"{best_time(args.repeat, recompute, hulls) * 1e3:>15.1f}" if frame_count <= args.recompute_limit else f"{'-':>15}"
+        merged = best_time(args.repeat, running, hulls)
+        states = best_time(args.repeat, streamed, spec)
+        once = best_time(args.repeat, final, hulls)
+        vertices = shapely.get_num_coordinates(shapely.union_all(hulls))
+        print(f"{frame_count:>7} {full} {merged * 1e3:>13.1f} {states * 1e3:>14.1f} {once * 1e3:>16.1f} {vertices:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""Measures generate_many() throughput for several worker counts."""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gear import generate_many, deg2rad
+
+
+def catalog(count, frame_count):
+    """Builds a catalog of distinct gear specs."""
+    return [dict(teeth_count=12 + i % 60, module=1.0 + 0.5 * (i // 60), pressure_angle=deg2rad(20.0),
+                 backlash=0.05, frame_count=frame_count, profile_shift=0.0, clearance_factor=0.167)
+            for i in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark generate_many() throughput.")
+    parser.add_argument('-w', '--workers', type=int, nargs='+', default=[1, 4, 16, 64], help="Worker counts to time")
+    parser.add_argument('-s', '--spec-count', type=int, default=240, help="Number of gears per run")
+    parser.add_argument('-n', '--frame-count', type=int, default=64, help="Number of frames for interpolation")
+    args = parser.parse_args()
+
+    specs = catalog(args.spec_count, args.frame_count)
+    print(f"{os.cpu_count()} CPUs, {len(specs)} gears")
+    print(f"{'workers':>8} {'time [s]':>9} {'gears/s':>9}")
+    for workers in args.workers:
+        start = time.perf_counter()
+        count = sum(1 for _ in generate_many(specs, workers=workers))
+        elapsed = time.perf_counter() - start
+        print(f"{workers:>8} {elapsed:>9.2f} {count / elapsed:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
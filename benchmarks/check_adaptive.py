@@ -0,0 +1,50 @@
+"""
+Accuracy check of the frame count derived from a tolerance.
+
+For every teeth count and tolerance, the cut swept with the frames of
+cutting_thetas(tol=...) is compared against a dense reference sweep, and the
+cut with half as many frames is shown alongside to see that the count is not
+larger than needed. Exits with status 1 when a cut deviates from the
+reference by more than its tolerance.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import shapely
+
+from gear import cutting_frames, cutting_thetas, deg2rad, rack_cutter
+
+
+def swept_cut(rack, thetas):
+    """Returns the union of the swept hulls within the blank."""
+    blank = shapely.Point(0., 0.).buffer(rack['outer_radius'], 256)
+    hulls = [frame.hull for frame in cutting_frames(rack['profile'], rack['pitch_radius'], thetas)]
+    return shapely.intersection(shapely.union_all(hulls), blank)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that the frame count derived from a tolerance honours it.")
+    parser.add_argument('-c', '--teeth-counts', type=int, nargs='+', default=[20, 60, 200], help="Teeth counts to check")
+    parser.add_argument('-t', '--tolerances', type=float, nargs='+', default=[0.01, 0.001], help="Tolerances in mm")
+    parser.add_argument('--reference-frames', type=int, default=20000, help="Frame count of the reference sweep")
+    args = parser.parse_args()
+
+    ok = True
+    print(f"{'teeth':>6} {'tol':>7} {'frames':>7} {'deviation':>9} {'half':>9}")
+    for teeth_count in args.teeth_counts:
+        rack = rack_cutter(teeth_count, 2.0, deg2rad(20.0), 0.1, 0.0, 0.167)
+        reference = swept_cut(rack, cutting_thetas(rack, args.reference_frames))
+        for tol in args.tolerances:
+            thetas = cutting_thetas(rack, tol=tol)
+            deviation = shapely.hausdorff_distance(swept_cut(rack, thetas), reference, densify=0.1)
+            half = shapely.hausdorff_distance(swept_cut(rack, cutting_thetas(rack, (len(thetas) + 1) // 2)), reference, densify=0.1)
+            print(f"{teeth_count:>6} {tol:>7g} {len(thetas):>7} {deviation:>9.5f} {half:>9.5f}" + ("" if deviation <= tol else "  FAIL"))
+            ok &= deviation <= tol
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Accuracy check of the curve-fitted DXF export.
+
+Every gear is exported with --fit-tolerance in both DXF flavours, read back
+with ezdxf and flattened, and compared with the polygon both ways: the
+flattened fit against the polygon edges, and the polygon edges against the
+fit, each segmentized so that deviations between vertices count. Exits with
+status 1 when a fit strays further than its tolerance.
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import shapely
+
+from gear import deg2rad, generate, write_output
+
+
+def read_fit(ezdxf, path, flatness):
+    """Returns the entities of a DXF file flattened to a MultiLineString."""
+    from ezdxf import path as dxf_path
+
+    lines = []
+    for entity in ezdxf.readfile(path).modelspace():
+        points = [(v.x, v.y) for v in dxf_path.make_path(entity).flattening(flatness)]
+        if len(points) > 1:
+            lines.append(points)
+    return shapely.MultiLineString(lines)
+
+
+def deviation(a, b, step):
+    """Largest distance from the lines of a, segmentized to step, to the lines of b."""
+    points = shapely.points(shapely.get_coordinates(shapely.segmentize(a, step)))
+    segments = [np.stack([line[:-1], line[1:]], axis=1) for line in map(shapely.get_coordinates, shapely.get_parts(b))]
+    tree = shapely.STRtree(shapely.linestrings(np.concatenate(segments)))
+    _, distances = tree.query_nearest(points, return_distance=True, all_matches=False)
+    return float(distances.max())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that fitted DXF outlines stay within their tolerance.")
+    parser.add_argument('-c', '--teeth-counts', type=int, nargs='+', default=[20, 60], help="Teeth counts to check")
+    parser.add_argument('-n', '--frame-count', type=int, default=128, help="Number of frames for interpolation")
+    parser.add_argument('-t', '--tolerances', type=float, nargs='+', default=[0.01, 0.001], help="Fit tolerances in mm")
+    args = parser.parse_args()
+    try:
+        import ezdxf
+    except ImportError:
+        sys.exit("check_fitting.py needs ezdxf to read the DXF files back (pip install ezdxf)")
+
+    ok = True
+    print(f"{'teeth':>6} {'tol':>7} {'version':>8} {'fit->poly':>10} {'poly->fit':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for teeth_count in args.teeth_counts:
+            gear_poly, _ = generate(teeth_count, 2.0, deg2rad(20.0), 0.1, args.frame_count, 0.0, 0.167)
+            boundary = gear_poly.boundary
+            for tol in args.tolerances:
+                for version in ('R2000', 'R12'):
+                    path = os.path.join(tmp, f'gear_{teeth_count}_{version}.dxf')
+                    write_output(path, 'dxf', gear_poly, version, fit_tolerance=tol)
+                    fit = read_fit(ezdxf, path, tol / 100)
+                    forward, backward = deviation(fit, boundary, tol / 4), deviation(boundary, fit, tol / 4)
+                    # Coordinates are written with 6 decimals
+                    failed = max(forward, backward) > tol + 1e-6
+                    print(f"{teeth_count:>6} {tol:>7g} {version:>8} {forward:>10.5f} {backward:>10.5f}" + ("  FAIL" if failed else ""))
+                    ok &= not failed
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Import-time budget check for the gear.py CLI.
+
+Runs `gear.py --help` and a single-gear DXF export under `python -X importtime`,
+sums the cumulative time of the top-level imports (best of several runs) and
+exits with status 1 when a budget is exceeded or when a module that the path
+should not need gets imported.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that each path must not import
+FORBIDDEN = {
+    'help': ['numpy', 'shapely', 'backends', 'concurrent.futures', 'csv', 'matplotlib'],
+    'dxf': ['backends.text', 'backends.binary', 'concurrent.futures', 'csv', 'matplotlib'],
+}
+
+
+def import_times(argv):
+    """Runs gear.py with -X importtime and returns {module: cumulative microseconds} of its top-level imports."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', os.path.join(ROOT, 'gear.py')] + argv,
+                            capture_output=True, text=True, cwd=ROOT, check=True)
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = (int(cumulative), not name[1:].startswith(' '))
+    return modules
+
+
+def check(label, argv, budget, repeat):
+    best, modules = None, {}
+    for _ in range(repeat):
+        modules = import_times(argv)
+        total = sum(cumulative for cumulative, top in modules.values() if top) / 1e3
+        best = total if best is None else min(best, total)
+
+    forbidden = [prefix for prefix in FORBIDDEN[label] if any(name == prefix or name.startswith(prefix + '.') for name in modules)]
+    slowest = sorted(((cumulative, name) for name, (cumulative, top) in modules.items() if top), reverse=True)[:5]
+    print(f"{label:<5} {best:>8.1f} ms (budget {budget:g} ms), slowest: " + ', '.join(f"{name} {t / 1e3:.1f}" for t, name in slowest))
+    for name in forbidden:
+        print(f"      unexpected import: {name}")
+    return best <= budget and not forbidden
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the import-time budget of the gear.py CLI.")
+    parser.add_argument('--help-budget', type=float, default=60.0, help="Budget of `gear.py --help` in milliseconds")
+    parser.add_argument('--dxf-budget', type=float, default=250.0, help="Budget of a single DXF export in milliseconds")
+    parser.add_argument('-r', '--repeat', type=int, default=5, help="Runs per path, the best one is kept")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ok = check('help', ['--help'], args.help_budget, args.repeat)
+        ok &= check('dxf', ['-c', '20', '-o', os.path.join(tmp, 'gear.dxf')], args.dxf_budget, args.repeat)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Benchmark suite for the gear pipeline.
+
+'run' times generate() over a grid of teeth counts, frame counts and modules,
+the DXF and text backends on the generated gears, and records the peak Python
+memory of each case with tracemalloc (GEOS allocations are not traced).
+Results are written as JSON. 'compare' checks a result file against a stored
+baseline and exits with status 1 when a case got slower than the threshold.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import shapely
+
+import backends.dxf
+import backends.text
+from gear import generate, deg2rad
+
+GRIDS = {
+    'full': dict(teeth=[8, 20, 50, 100, 200, 400], frames=[8, 32, 128, 512, 2048], modules=[1.0, 2.0]),
+    'quick': dict(teeth=[8, 50, 200], frames=[8, 128], modules=[2.0]),
+}
+BACKENDS = {
+    'dxf': backends.dxf.write,
+    'dxf-r12': lambda out, geom: backends.dxf.write(out, geom, 'R12'),
+    'text': backends.text.write,
+}
+
+
+def measure(function, repeat):
+    """Returns the wall times of several calls and the last return value."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+    return times, result
+
+
+def peak_memory(function):
+    """Returns the peak traced allocation of one call, in bytes."""
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def record(name, times, peak, **extra):
+    return dict(name=name, best=min(times), median=statistics.median(times), repeat=len(times), peak_bytes=peak, **extra)
+
+
+def run(args):
+    grid = GRIDS[args.grid]
+    results = []
+    for engine in args.engines:
+        frame_counts = grid['frames'] if engine == 'sweep' else [32]
+        for teeth_count in grid['teeth']:
+            for frame_count in frame_counts:
+                for module in grid['modules']:
+                    params = dict(teeth_count=teeth_count, module=module, pressure_angle=deg2rad(20.0), backlash=0.05 * module,
+                                  frame_count=frame_count, profile_shift=0.0, clearance_factor=0.167, engine=engine)
+                    call = lambda: generate(**params)
+                    times, (gear_poly, _) = measure(call, args.repeat)
+                    name = f"generate/{engine}/t{teeth_count}/f{frame_count}/m{module:g}"
+                    results.append(record(name, times, peak_memory(call), vertices=int(shapely.get_num_coordinates(gear_poly))))
+                    print(f"{name:<40} {min(times) * 1e3:>10.2f} ms", flush=True)
+
+                    if module != grid['modules'][0] or engine != 'sweep':
+                        continue
+                    for backend, write in BACKENDS.items():
+                        out = io.StringIO()
+                        export = lambda: write(io.StringIO(), gear_poly)
+                        times, _ = measure(export, args.repeat)
+                        write(out, gear_poly)
+                        size = len(out.getvalue())
+                        name = f"write/{backend}/t{teeth_count}/f{frame_count}"
+                        results.append(record(name, times, peak_memory(export), bytes=size,
+                                              throughput=size / min(times)))
+                        print(f"{name:<40} {min(times) * 1e3:>10.2f} ms {size / min(times) / 2 ** 20:>8.1f} MiB/s", flush=True)
+
+    meta = dict(python=platform.python_version(), numpy=np.__version__, shapely=shapely.__version__,
+                machine=platform.platform(), cpus=os.cpu_count(), date=time.strftime('%Y-%m-%dT%H:%M:%S'))
+    with open(args.output, 'w') as f:
+        json.dump(dict(meta=meta, results=results), f, indent=1)
+    print(f"Wrote {len(results)} results to {args.output}")
+
+
+def compare(args):
+    with open(args.baseline) as f:
+        baseline = {r['name']: r for r in json.load(f)['results']}
+    with open(args.current) as f:
+        current = {r['name']: r for r in json.load(f)['results']}
+
+    regressions = 0
+    print(f"{'case':<40} {'baseline':>10} {'current':>10} {'ratio':>7}")
+    for name in sorted(baseline.keys() & current.keys()):
+        old, new = baseline[name]['best'], current[name]['best']
+        slower = new > old * (1 + args.threshold) and new - old > args.min_delta
+        regressions += slower
+        print(f"{name:<40} {old * 1e3:>8.2f}ms {new * 1e3:>8.2f}ms {new / old:>6.2f}x{'  REGRESSION' if slower else ''}")
+    for name in sorted(baseline.keys() - current.keys()):
+        print(f"{name:<40} missing from {args.current}")
+
+    print(f"{regressions} regression(s) beyond {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark suite for the gear pipeline.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="Run the benchmarks and write a JSON result file")
+    run_parser.add_argument('-g', '--grid', choices=sorted(GRIDS), default='full', help="Parameter grid")
+    run_parser.add_argument('-e', '--engines', nargs='+', choices=['sweep', 'analytic'], default=['sweep', 'analytic'], help="Engines to time")
+    run_parser.add_argument('-r', '--repeat', type=int, default=3, help="Repetitions per case")
+    run_parser.add_argument('-o', '--output', default='bench.json', help="Result file")
+
+    compare_parser = commands.add_parser('compare', help="Compare a result file against a baseline")
+    compare_parser.add_argument('baseline', help="Baseline result file")
+    compare_parser.add_argument('current', help="Result file to check")
+    compare_parser.add_argument('-t', '--threshold', type=float, default=0.15, help="Allowed relative slowdown")
+    compare_parser.add_argument('--min-delta', type=float, default=0.0005, help="Ignore slowdowns below this many seconds")
+
+    args = parser.parse_args()
+    if args.command == 'run':
+        run(args)
+    else:
+        sys.exit(compare(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,346 @@
+"""Caches for generated gear geometry."""
+import hashlib
+import inspect
+import json
+import os
+import tempfile
+from collections import OrderedDict
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+import shapely
+from shapely.affinity import scale
+
+import gear
+from gear import GenerateStats, generate, deg2rad, plain_value
+
+
+def quantize(value, digits=12):
+    """Rounds a float parameter so that it can be used in a cache key."""
+    return round(float(value), digits)
+
+
+def bind_call(signature, args, kwargs):
+    """
+    Binds a call of a cached function and returns it with the caller's stats
+    (or None). A function taking stats always gets one, so that the parameters
+    it derives can be stored with its result.
+    """
+    bound = signature.bind(*args, **kwargs)
+    bound.apply_defaults()
+    stats = bound.arguments.get('stats')
+    if 'stats' in signature.parameters and stats is None:
+        bound.arguments['stats'] = GenerateStats()
+    return bound, stats
+
+
+def record_call(stats, params, hit):
+    """Fills the caller's stats with the derived parameters of a result and whether it came from the cache."""
+    if stats is not None:
+        stats.params.update(params)
+        stats.params['cache_hit'] = hit
+
+
+class ModuleCache:
+    """
+    Generates gears once at unit module and serves every other module by scaling.
+
+    Every length in generate() is proportional to the module except the backlash
+    (and the sampling tolerance), which are absolute. They are divided by the
+    module before generating, so the unit outline is keyed on backlash / module
+    and scaling it back is exact. The lengths among the derived parameters
+    recorded in stats are scaled the same way.
+    """
+
+    lengths = ('pitch_diameter', 'pitch_radius', 'base_radius', 'addendum_radius', 'dedendum_radius', 'tooth_thickness')
+
+    def __init__(self):
+        self.outlines = {}
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, teeth_count, pressure_angle, backlash_ratio, frame_count, profile_shift, clearance_factor, **kwargs):
+        """Builds the cache key from the dimensionless gear parameters."""
+        options = tuple(sorted((k, quantize(v) if isinstance(v, float) else v) for k, v in kwargs.items() if k != 'stats'))
+        return (int(teeth_count), quantize(pressure_angle), quantize(backlash_ratio), int(frame_count),
+                quantize(profile_shift), quantize(clearance_factor), options)
+
+    def generate(self, teeth_count=8, module=2.0, pressure_angle=deg2rad(20.0), backlash=0.0, frame_count=16, profile_shift=0.5, clearance_factor=0.167, **kwargs):
+        """Same arguments and return value as gear.generate()."""
+        stats = kwargs.pop('stats', None)
+        if kwargs.get('tol') is not None:
+            kwargs['tol'] = kwargs['tol'] / module
+        params = (teeth_count, pressure_angle, backlash / module, frame_count, profile_shift, clearance_factor)
+
+        key = self.key(*params, **kwargs)
+        hit = key in self.outlines
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+            unit = GenerateStats()
+            unit_poly, unit_pitch_radius = generate(params[0], 1.0, *params[1:], **kwargs, stats=unit)
+            self.outlines[key] = (unit_poly, unit_pitch_radius, unit.params)
+            if stats is not None:
+                for name, seconds in unit.times.items():
+                    stats.times[name] = stats.times.get(name, 0.0) + seconds
+                stats.vertices.update(unit.vertices)
+                stats.shapely_ops += unit.shapely_ops
+
+        unit_poly, unit_pitch_radius, unit_params = self.outlines[key]
+        record_call(stats, {name: value * module if name in self.lengths else value for name, value in unit_params.items()}, hit)
+        return scale(unit_poly, module, module, origin=(0., 0.)), unit_pitch_radius * module
+
+    def clear(self):
+        """Drops every cached outline."""
+        self.outlines.clear()
+
+
+class LRUCache:
+    """
+    Bounded least-recently-used memoization of generate().
+
+    Float parameters are quantized to `digits` decimals, so that slider values
+    such as 2.0000000001 and 2.0 share an entry. Shapely geometries are
+    immutable, so cached results are returned as-is and can safely be shared
+    between callers. A stats argument is filled with the derived parameters
+    stored with the entry, and stats.params['cache_hit'] tells whether the
+    call was served from the cache.
+
+    Args:
+    - maxsize: Maximum number of cached gears
+    - max_bytes: Maximum estimated size of the cached coordinates
+    - digits: Number of decimals kept when quantizing float parameters
+    - function: Generator to memoize, gear.generate by default
+    """
+
+    def __init__(self, maxsize=128, max_bytes=64 * 2 ** 20, digits=9, function=generate):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.digits = digits
+        self.function = function
+        self.signature = inspect.signature(function)
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, *args, **kwargs):
+        """Builds the quantized key of a call, with defaults filled in."""
+        bound = self.signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        return tuple((name, quantize(value, self.digits) if isinstance(value, float) else value)
+                     for name, value in bound.arguments.items() if name != 'stats')
+
+    def generate(self, *args, **kwargs):
+        """Same arguments and return value as the memoized function."""
+        key = self.key(*args, **kwargs)
+        bound, stats = bind_call(self.signature, args, kwargs)
+        if key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            result, _, params = self.entries[key]
+            record_call(stats, params, True)
+            return result
+
+        self.misses += 1
+        result = self.function(*bound.args, **bound.kwargs)
+        params = dict(bound.arguments['stats'].params) if 'stats' in bound.arguments else {}
+        record_call(stats, params, False)
+        size = 16 * int(shapely.get_num_coordinates(result[0]))
+        self.entries[key] = (result, size, params)
+        self.nbytes += size
+        while len(self.entries) > 1 and (len(self.entries) > self.maxsize or self.nbytes > self.max_bytes):
+            self._evict(next(iter(self.entries)))
+            self.evictions += 1
+        return result
+
+    def invalidate(self, *args, **kwargs):
+        """Drops the entry matching the given call, or every entry when called without arguments."""
+        if not args and not kwargs:
+            self.entries.clear()
+            self.nbytes = 0
+        else:
+            key = self.key(*args, **kwargs)
+            if key in self.entries:
+                self._evict(key)
+
+    def stats(self):
+        """Returns the cache counters."""
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'entries': len(self.entries), 'bytes': self.nbytes}
+
+    def _evict(self, key):
+        _, size, _ = self.entries.pop(key)
+        self.nbytes -= size
+
+
+def code_version():
+    """Hashes the generator source, so that cached geometry is dropped whenever it changes."""
+    with open(gear.__file__, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:16]
+
+
+class FileLock:
+    """Exclusive inter-process lock held on a file for the duration of a with block."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def __enter__(self):
+        self.f = open(self.path, 'a+b')
+        if fcntl is not None:
+            fcntl.flock(self.f, fcntl.LOCK_EX)
+        else:
+            self.f.seek(0)
+            msvcrt.locking(self.f.fileno(), msvcrt.LK_LOCK, 1)
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl is not None:
+            fcntl.flock(self.f, fcntl.LOCK_UN)
+        else:
+            self.f.seek(0)
+            msvcrt.locking(self.f.fileno(), msvcrt.LK_UNLCK, 1)
+        self.f.close()
+
+
+class DiskCache:
+    """
+    Persistent cache of generate() results, shared between processes.
+
+    Each entry is one file holding a JSON metadata line (parameters, pitch
+    radius, derived parameters, code version) followed by the gear as WKB.
+    A stats argument is filled with the derived parameters on a hit as well,
+    and stats.params['cache_hit'] tells whether the call was served from disk. Files are named after a
+    hash of the quantized parameters and the code version, written to a
+    temporary file and moved into place atomically. Writers and eviction are
+    serialized with a lock file, and the least recently used entries are
+    removed once the directory grows past max_bytes, down to 90% of it. The
+    total size is kept in a size file next to the lock, so that writes only
+    scan the directory when they push it over the budget.
+
+    Args:
+    - directory: Cache directory, created if missing
+    - max_bytes: Size budget of the cache directory
+    - digits: Number of decimals kept when quantizing float parameters
+    - function: Generator to cache, gear.generate by default
+    """
+
+    suffix = '.gear'
+    low_water = 0.9  # Fraction of max_bytes left after an eviction
+
+    def __init__(self, directory, max_bytes=256 * 2 ** 20, digits=9, function=generate):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.digits = digits
+        self.function = function
+        self.signature = inspect.signature(function)
+        self.version = code_version()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def params(self, *args, **kwargs):
+        """Returns the canonical, quantized parameters of a call."""
+        bound = self.signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        return {name: quantize(value, self.digits) if isinstance(value, float) else value
+                for name, value in bound.arguments.items() if name != 'stats'}
+
+    def path(self, params):
+        """Returns the entry file of the given canonical parameters."""
+        text = json.dumps([self.version, params], sort_keys=True)
+        return os.path.join(self.directory, hashlib.sha256(text.encode()).hexdigest() + self.suffix)
+
+    def generate(self, *args, **kwargs):
+        """Same arguments and return value as the cached function."""
+        params = self.params(*args, **kwargs)
+        path = self.path(params)
+        bound, stats = bind_call(self.signature, args, kwargs)
+        try:
+            with open(path, 'rb') as f:
+                meta = json.loads(f.readline())
+                geom = shapely.from_wkb(f.read())
+        except (OSError, ValueError, shapely.errors.GEOSException):
+            pass
+        else:
+            self.hits += 1
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+            record_call(stats, meta.get('derived', {}), True)
+            return geom, meta['pitch_radius']
+
+        self.misses += 1
+        geom, pitch_radius = self.function(*bound.args, **bound.kwargs)
+        derived = dict(bound.arguments['stats'].params) if 'stats' in bound.arguments else {}
+        record_call(stats, derived, False)
+        meta = {'params': params, 'pitch_radius': pitch_radius, 'derived': derived, 'version': self.version}
+        self._write(path, json.dumps(meta, default=plain_value).encode() + b'\n' + shapely.to_wkb(geom))
+        return geom, pitch_radius
+
+    def clear(self):
+        """Removes every entry."""
+        with FileLock(os.path.join(self.directory, '.lock')):
+            for entry in self._entries():
+                os.remove(entry.path)
+            self._write_size(0)
+
+    def _entries(self):
+        return [entry for entry in os.scandir(self.directory) if entry.name.endswith(self.suffix)]
+
+    def _write(self, path, data):
+        with FileLock(os.path.join(self.directory, '.lock')):
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                try:
+                    replaced = os.path.getsize(path)
+                except OSError:
+                    replaced = 0
+                os.replace(tmp, path)
+            except BaseException:
+                os.remove(tmp)
+                raise
+
+            total = self._read_size()
+            if total is None:
+                total = sum(entry.stat().st_size for entry in self._entries())
+            else:
+                total += len(data) - replaced
+            if total > self.max_bytes:
+                total = self._evict()
+            self._write_size(total)
+
+    def _read_size(self):
+        """Returns the total recorded in the size file, or None when it is missing or unreadable."""
+        try:
+            with open(os.path.join(self.directory, '.size')) as f:
+                return int(f.read())
+        except (OSError, ValueError):
+            return None
+
+    def _write_size(self, total):
+        with open(os.path.join(self.directory, '.size'), 'w') as f:
+            f.write(str(total))
+
+    def _evict(self):
+        """Removes the least recently used entries down to the low-water mark, returning the remaining size."""
+        entries = sorted(self._entries(), key=lambda entry: entry.stat().st_mtime)
+        total = sum(entry.stat().st_size for entry in entries)
+        for entry in entries[:-1]:
+            if total <= self.low_water * self.max_bytes:
+                break
+            total -= entry.stat().st_size
+            os.remove(entry.path)
+            self.evictions += 1
+        return total
@@ -1,14 +1,81 @@
 import sys
-import numpy as np
 import argparse
-import itertools
+import importlib
+import importlib.util
+import json
+import math
+import os
+import time
+from contextlib import contextmanager
 
-import backends.dxf
-import backends.text
 
-from shapely.ops import unary_union
-from shapely.geometry import Point, MultiPoint, Polygon, box
-from shapely.affinity import rotate, scale, translate
+def lazy_import(name):
+    """
+    Returns a module that is only executed on first attribute access, so that
+    paths such as --help never pay for importing numpy or shapely.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    spec.loader = importlib.util.LazyLoader(spec.loader)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+np = lazy_import('numpy')
+shapely = lazy_import('shapely')
+
+
+def load_modules():
+    """
+    Executes the lazily imported numpy and shapely if they have not run yet,
+    so that their import time is not charged to the first timed stage.
+    """
+    np.ndarray, shapely.Geometry
+
+
+class GenerateStats:
+    """
+    Records where the time of a generate() call goes.
+
+    Holds the derived gear parameters, the wall time of every stage, the vertex
+    count of the geometry produced by each stage and the number of shapely
+    operations performed. Pass an instance as generate(..., stats=...).
+    """
+
+    def __init__(self):
+        self.params = {}
+        self.times = {}
+        self.vertices = {}
+        self.shapely_ops = 0
+
+    @contextmanager
+    def stage(self, name):
+        """Times the enclosed block, accumulating into the named stage."""
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.times[name] = self.times.get(name, 0.0) + time.perf_counter() - start
+
+    def count(self, name, geom, ops=1):
+        """Records the vertex count of a stage's result and the shapely operations it took."""
+        self.vertices[name] = int(np.sum(shapely.get_num_coordinates(geom)))
+        self.shapely_ops += ops
+
+    def as_dict(self):
+        return {'params': self.params, 'times': self.times, 'vertices': self.vertices,
+                'shapely_ops': self.shapely_ops, 'total_time': sum(self.times.values())}
+
+    def __str__(self):
+        lines = [f"{name}: {value:.3f}" if isinstance(value, float) else f"{name}: {value}" for name, value in self.params.items()]
+        for name, seconds in self.times.items():
+            vertices = f", {self.vertices[name]} vertices" if name in self.vertices else ""
+            lines.append(f"{name}: {seconds * 1e3:.2f} ms{vertices}")
+        lines.append(f"shapely ops: {self.shapely_ops}")
+        return '\n'.join(lines)
 
 
 def rot_matrix(x):
@@ -25,28 +92,210 @@ def rotation(X, angle, center=None):
         return np.dot(X - center, rot_matrix(angle)) + center
 
 
+def rotations(X, angles):
+    """Applies rotation() with one angle per point; angles broadcast against X[..., 0]."""
+    c, s = np.cos(angles), np.sin(angles)
+    x, y = X[..., 0], X[..., 1]
+    return np.stack([x * c + y * s, y * c - x * s], axis=-1)
+
+
 def deg2rad(x):
     """Converts degrees to radians."""
-    return (np.pi / 180) * x
+    return (math.pi / 180) * x
+
+
+def pitch_rotations(teeth_count):
+    """Precomputes counter-clockwise rotation matrices for every multiple of the tooth pitch."""
+    angles = (2 * np.pi / teeth_count) * np.arange(teeth_count)
+    return np.moveaxis(rot_matrix(-angles), -1, 0)
 
 
-def generate(teeth_count=8, module=2.0, pressure_angle=deg2rad(20.0), backlash=0.0, frame_count=16, profile_shift=0.5, clearance_factor=0.167):
+def arc(radius, start, stop, resolution=16):
+    """Samples a circular arc with the same vertex density as Point.buffer."""
+    segments = max(int(np.ceil(abs(stop - start) * 2 * resolution / np.pi)), 1)
+    t = np.linspace(start, stop, segments + 1)
+    return radius * np.column_stack([np.cos(t), np.sin(t)])
+
+
+def sector_chain(sector, start, end, avoid):
     """
-    Generates a 2D gear profile using rack cutting principles, now with:
-    - Profile shifting (x)
-    - Adjustable clearance
+    Extracts the boundary path of a sector polygon running from start to end.
 
-    Args:
-    - teeth_count: Number of teeth
-    - module: Defines gear size
-    - pressure_angle: Standardized pressure angle (default 20°)
-    - backlash: Space left between meshing teeth
-    - frame_count: Number of interpolation steps for smooth transition
-    - profile_shift: Amount of profile shift (x), default = 0 (standard gear)
-    - clearance_factor: Factor for clearance (default 0.167m)
+    Of the two paths between the vertices nearest to start and end, the one that
+    does not pass through the vertex nearest to avoid is returned. Raises
+    ValueError if start or end are not vertices of the sector.
+    """
+    coords = np.asarray(sector.exterior.coords)[:-1]
+    n = len(coords)
+    i, j, k = (int(np.argmin(np.hypot(*(coords - p).T))) for p in (start, end, avoid))
+    if not (np.allclose(coords[i], start) and np.allclose(coords[j], end)):
+        raise ValueError("sector boundary does not pass through the chain endpoints")
+
+    if (k - i) % n <= (j - i) % n:
+        return coords[(i - np.arange((i - j) % n + 1)) % n]
+    return coords[(i + np.arange((j - i) % n + 1)) % n]
+
+
+def assemble_outline(chain, teeth_count):
+    """Builds a closed outline by repeating a one-pitch chain around the origin."""
+    copies = np.einsum('mj,njk->nmk', chain[:-1], pitch_rotations(teeth_count))
+    return copies.reshape(-1, 2)
+
+
+def cut_sector(tooth_poly, outer_radius, teeth_count, stats=None):
+    """
+    Cuts a single tooth space out of a one-pitch sector of the blank and
+    rotates the resulting outline around the gear.
+
+    Returns None when the sector cannot be stitched (e.g. pointed teeth whose
+    tip land vanishes) or when there is nothing to cut (a single frame), so
+    that the caller can fall back to the full loop.
     """
+    if tooth_poly.is_empty:
+        return None
+
+    step = 2 * np.pi / teeth_count
+    a0, a1 = np.pi / 2 - step / 2, np.pi / 2 + step / 2
+    tip = arc(outer_radius, a0, a1)
+    blank = shapely.Polygon(np.vstack([[0., 0.], tip]))
+
+    # Only the neighbouring tooth spaces that reach into the sector need cutting
+    x, y = shapely.get_coordinates(tooth_poly).T
+    extent = np.max(np.abs(np.arctan2(x, y)))
+    reach = min(int(np.ceil((extent + step / 2) / step)), teeth_count // 2)
+    cuts = shapely.union_all([shapely.affinity.rotate(tooth_poly, k * step, shapely.Point(0., 0.), use_radians=True) for k in range(-reach, reach + 1)])
+
+    sector = blank.difference(cuts)
+    if stats is not None:
+        stats.shapely_ops += 2 * reach + 3
+    if not isinstance(sector, shapely.Polygon):
+        return None
+    try:
+        chain = sector_chain(sector, tip[0], tip[-1], (0., 0.))
+    except ValueError:
+        return None
+
+    return shapely.Polygon(assemble_outline(chain, teeth_count))
+
+
+def polar(X):
+    """Returns the radius and the clockwise angle from the +y axis of each point."""
+    return np.hypot(X[:, 0], X[:, 1]), np.arctan2(X[:, 0], X[:, 1])
 
-    # Step 1: Compute Correct Gear Parameters (Profile Shift Considered)
+
+def from_polar(rho, phi):
+    """Inverse of polar()."""
+    return np.column_stack([rho * np.sin(phi), rho * np.cos(phi)])
+
+
+def analytic_chain(teeth_count, pitch_radius, pressure_angle, tooth_thickness, addendum, dedendum, samples=16):
+    """
+    Evaluates the one-pitch outline that the rack cutter generates, in closed form.
+
+    The rack flank generates an involute and the corner of the rack tip generates
+    a trochoid root fillet. Both are sampled with vectorized NumPy and combined
+    in polar form: at every radius the tooth space is as wide as the wider of
+    the two curves, which also trims undercut flanks.
+
+    Returns the chain running counter-clockwise from the tooth centre at
+    pi/2 - pi/teeth_count to the tooth centre at pi/2 + pi/teeth_count.
+    """
+    r, w = pitch_radius, 0.5 * tooth_thickness
+    sin_a, cos_a = np.sin(pressure_angle), np.cos(pressure_angle)
+    outer_radius, root_radius = r + addendum, r - dedendum
+    half_pitch = np.pi / teeth_count
+
+    corner = w - dedendum * np.tan(pressure_angle)
+    if corner <= 0:
+        raise ValueError("the rack cutter tip is too narrow for the analytic engine")
+
+    # Involute: the flank touches the gear where its normal passes through the
+    # pitch point; below the base circle (undercut) there is no contact
+    v_min = max(-dedendum, -r * sin_a ** 2)
+    v = np.linspace(v_min, addendum, samples)
+    theta = (w + v / (sin_a * cos_a)) / r
+    involute = rotations(np.column_stack([-v * cos_a / sin_a, r + v]), theta)
+
+    # Trochoid: path of the rack tip corner, from the root circle outwards until
+    # it joins the involute (or, with undercut, crosses the flank)
+    theta_root = corner / r
+    if v_min > -dedendum:
+        theta_end = (corner - np.sqrt(outer_radius ** 2 - root_radius ** 2)) / r
+    else:
+        theta_end = (w - dedendum / (sin_a * cos_a)) / r
+    theta = np.linspace(theta_root, theta_end, samples)
+    trochoid = rotations(np.column_stack([corner - theta * r, np.full(samples, root_radius)]), theta)
+
+    # Tooth space half-width as a function of radius
+    rho_i, phi_i = polar(involute)
+    rho_t, phi_t = polar(trochoid)
+    rho = np.unique(np.concatenate([rho_i, rho_t, [outer_radius]]))
+    rho = rho[(rho >= root_radius) & (rho <= outer_radius)]
+    phi_i = np.interp(rho, rho_i, phi_i, left=-np.inf, right=np.inf)
+    phi_t = np.interp(rho, rho_t, phi_t, left=np.inf, right=-np.inf)
+
+    # Insert the points where the two curves cross so that kinks are kept exactly
+    diff = phi_i - phi_t
+    k = np.flatnonzero(np.isfinite(diff[:-1]) & np.isfinite(diff[1:]) & (np.sign(diff[:-1]) * np.sign(diff[1:]) < 0))
+    if len(k):
+        f = diff[k] / (diff[k] - diff[k + 1])
+        rho_x = rho[k] + f * (rho[k + 1] - rho[k])
+        phi_x = phi_t[k] + f * (phi_t[k + 1] - phi_t[k])
+        rho = np.insert(rho, k + 1, rho_x)
+        phi = np.insert(np.maximum(phi_i, phi_t), k + 1, phi_x)
+    else:
+        phi = np.maximum(phi_i, phi_t)
+
+    # Pointed teeth: neighbouring spaces meet before the outer radius
+    top = np.flatnonzero(phi >= half_pitch)
+    if len(top):
+        j = top[0]
+        f = (half_pitch - phi[j - 1]) / (phi[j] - phi[j - 1])
+        rho = np.append(rho[:j], rho[j - 1] + f * (rho[j] - rho[j - 1]))
+        phi = np.append(phi[:j], half_pitch)
+
+    # Right half: tip land, flank from tip to root, half of the root land
+    right = np.vstack([
+        arc(outer_radius, np.pi / 2 - half_pitch, np.pi / 2 - phi[-1]) if phi[-1] < half_pitch else np.empty((0, 2)),
+        from_polar(rho[::-1], phi[::-1]),
+        arc(root_radius, np.pi / 2 - phi[0], np.pi / 2),
+    ])
+    chain = np.vstack([right, right[-2::-1] * [-1., 1.]])
+    keep = np.concatenate([[True], np.hypot(*np.diff(chain, axis=0).T) > 1e-12])
+    return chain[keep]
+
+
+def cutter_frames(profile, pitch_radius, thetas):
+    """Places the rack cutter profile for every rolling angle at once, returning an (F, P, 2) array."""
+    offsets = np.column_stack([-thetas * pitch_radius, np.full(len(thetas), pitch_radius)])
+    return rotations(profile[None, :, :] + offsets[:, None, :], thetas[:, None])
+
+
+def swept_hulls(frames):
+    """Returns the convex hulls swept between consecutive cutter frames as a geometry array."""
+    return shapely.convex_hull(shapely.linestrings(np.concatenate([frames[1:], frames[:-1]], axis=-2)))
+
+
+def shaper_frames(tooth, center_distance, ratio, phis):
+    """
+    Places a pinion-shaper cutter tooth rolling inside an internal gear for
+    every rolling angle at once, returning an (F, P, 2) array.
+
+    The cutter centre sits at center_distance in the direction pi/2 + phi and
+    the cutter turns by phi * (1 - ratio), ratio being the gear to cutter pitch
+    radius ratio, so that both pitch circles roll without slipping. tooth is
+    given pointing at +y from the cutter centre.
+    """
+    centers = center_distance * np.column_stack([-np.sin(phis), np.cos(phis)])
+    return rotations(tooth[None, :, :], -(phis * (1 - ratio))[:, None]) + centers[:, None, :]
+
+
+def rack_cutter(teeth_count=8, module=2.0, pressure_angle=deg2rad(20.0), backlash=0.0, profile_shift=0.5, clearance_factor=0.167):
+    """
+    Computes the gear parameters of generate() and the trapezoid tooth profile
+    of its rack cutter, returned together as a dict.
+    """
+    # Profile shift considered
     pitch_diameter = module * (teeth_count + 2 * profile_shift)  # Corrected formula with profile shift
     pitch_radius = pitch_diameter / 2
     circular_pitch = np.pi * module
@@ -60,19 +309,7 @@ def generate(teeth_count=8, module=2.0, pressure_angle=deg2rad(20.0), backlash=0
     clearance = clearance_factor * module  # User-defined or default 0.167m
     dedendum = module + clearance  # Standard depth
 
-    # Compute Outer and Root Radii
-    outer_radius = pitch_radius + addendum
-    root_radius = pitch_radius - dedendum
-
-    print(f"[DEBUG] Pitch Diameter: {pitch_diameter:.3f}")
-    print(f"[DEBUG] Pitch Radius: {pitch_radius:.3f}")
-    print(f"[DEBUG] Base Radius: {base_radius:.3f}")
-    print(f"[DEBUG] Addendum Radius: {outer_radius:.3f}")
-    print(f"[DEBUG] Dedendum Radius: {root_radius:.3f}")
-    print(f"[DEBUG] Tooth Thickness: {tooth_thickness:.3f}")
-    print(f"[DEBUG] Profile Shift: {profile_shift:.3f}")
-
-    # Step 2: Define the Tooth Profile
+    # Define the Tooth Profile
     profile = np.array([
         [-(0.5 * tooth_thickness + addendum * np.tan(pressure_angle)),  addendum],
         [-(0.5 * tooth_thickness - dedendum * np.tan(pressure_angle)), -dedendum],
@@ -80,31 +317,598 @@ def generate(teeth_count=8, module=2.0, pressure_angle=deg2rad(20.0), backlash=0
         [ (0.5 * tooth_thickness + addendum * np.tan(pressure_angle)),  addendum]
     ])
 
-    # Step 3: Generate Full Gear Using Rotation & Rack Cutting
-    poly_list = []
-    prev_X = None
-    l = 2 * tooth_thickness / pitch_radius  # Small angular movement per frame
+    return {
+        'pitch_diameter': pitch_diameter,
+        'pitch_radius': pitch_radius,
+        'base_radius': base_radius,
+        'tooth_thickness': tooth_thickness,
+        'addendum': addendum,
+        'dedendum': dedendum,
+        'outer_radius': pitch_radius + addendum,
+        'root_radius': pitch_radius - dedendum,
+        'profile': profile,
+    }
+
+
+def cutting_thetas(rack, frame_count=16, tol=None):
+    """
+    Returns the rolling angles of the rack cutter sweep: frame_count evenly
+    spaced angles, or as many as keep the swept envelope within tol when it
+    is set.
+
+    The hull of two frames cuts the flank along a chord between them, so the
+    envelope lies inside the involute by up to L * dtheta / 4, L being the
+    flank length of the rack tooth and dtheta the frame spacing. This first
+    order error is the same along the whole sweep, hence the even spacing.
+    """
+    l = 2 * rack['tooth_thickness'] / rack['pitch_radius']  # Small angular movement per frame
+    if tol is not None:
+        flank = np.hypot(*(rack['profile'][0] - rack['profile'][1]))
+        frame_count = int(np.ceil(flank * l / (4 * tol))) + 1
+    return np.linspace(0, l, frame_count)
+
+
+class UnionAccumulator:
+    """
+    Running union of a stream of polygons, merged hierarchically like a binary
+    counter. Polygons are first collected into leaves of batch_size, each
+    merged with a single union_all(); whenever two blocks then hold the same
+    number of leaves they are merged into one. Every polygon takes part in
+    about log2(n / batch_size) merges of balanced size, instead of being
+    merged into an ever growing envelope.
+
+    At most batch_size inputs and log2(n / batch_size) + 1 partial unions are
+    kept, the inputs being dropped once merged. parts is the current state,
+    whose union is the union of everything added so far; union() materializes
+    it.
+
+    prefix_union() materializes the union after a given number of inputs and
+    keeps the last one, so that reading it after every input only merges one
+    more polygon into it, as a running union does.
+    """
+
+    def __init__(self, batch_size=16):
+        self.batch_size = batch_size
+        self.pending = []
+        self.blocks = []
+        self.count = 0
+        self.merges = 0
+        self.prefix = None
+        self.prefix_count = 0
+
+    def add(self, geom):
+        self.pending.append(geom)
+        self.count += 1
+        if len(self.pending) < self.batch_size:
+            return
+        self.blocks.append((1, shapely.union_all(self.pending)))
+        self.pending = []
+        self.merges += 1
+        while len(self.blocks) > 1 and self.blocks[-1][0] == self.blocks[-2][0]:
+            (n, newer), (_, older) = self.blocks.pop(), self.blocks.pop()
+            self.blocks.append((2 * n, shapely.union(older, newer)))
+            self.merges += 1
+
+    @property
+    def parts(self):
+        return tuple(geom for _, geom in self.blocks) + tuple(self.pending)
+
+    def union(self):
+        return shapely.union_all(self.parts)
+
+    def prefix_union(self, count, last, parts):
+        """
+        Returns the union of the first count inputs, last being the count-th
+        one and parts the state after it. The previous prefix is extended by
+        last when it holds count - 1 inputs, otherwise parts are merged.
+        """
+        if self.prefix is not None and self.prefix_count == count - 1:
+            self.prefix = shapely.union(self.prefix, last)
+        elif self.prefix is None or self.prefix_count != count:
+            self.prefix = shapely.union_all(parts)
+        self.prefix_count = count
+        return self.prefix
 
-    for theta in np.linspace(0, l, frame_count):
-        X = rotation(profile + np.array([-theta * pitch_radius, pitch_radius]), theta)
-        if prev_X is not None:
-            poly_list.append(MultiPoint([x for x in X] + [x for x in prev_X]).convex_hull)
-        prev_X = X
+
+class CuttingFrame:
+    """
+    One step of the rack cutter sweep.
+
+    Attributes:
+    - index: Step number, from 0
+    - theta: Rolling angle of the cutter at the end of the step
+    - cutter: (P, 2) cutter profile at theta
+    - hull: Convex hull swept by the cutter since the previous step
+    - parts: Partial unions of every hull so far, see UnionAccumulator (None
+      unless requested)
+    - cut: Union of every hull so far, computed on first access. Reading it
+      frame after frame extends the previous frame's cut by one hull; out of
+      order it is merged from parts.
+    """
+
+    def __init__(self, index, theta, cutter, hull, parts=None, accumulator=None):
+        self.index = index
+        self.theta = theta
+        self.cutter = cutter
+        self.hull = hull
+        self.parts = parts
+        self._accumulator = accumulator
+        self._count = accumulator.count if accumulator is not None else None
+        self._cut = None
+
+    @property
+    def cut(self):
+        if self._cut is None and self.parts is not None:
+            self._cut = self._accumulator.prefix_union(self._count, self.hull, self.parts)
+            self._accumulator = None
+        return self._cut
+
+
+def cutting_frames(profile, pitch_radius, thetas, cumulative=False, chunk_size=256, accumulator=None):
+    """
+    Lazily yields a CuttingFrame for every step between consecutive rolling
+    angles. Poses and hulls are computed with vectorized calls, chunk_size
+    steps at a time, so that memory does not grow with the sweep length.
+    Hulls are added to accumulator when one is given. With cumulative, each
+    frame also carries the cut made so far.
+    """
+    if cumulative and accumulator is None:
+        accumulator = UnionAccumulator()
+    for start in range(0, len(thetas) - 1, chunk_size):
+        block = thetas[start:start + chunk_size + 1]
+        frames = cutter_frames(profile, pitch_radius, block)
+        for i, hull in enumerate(swept_hulls(frames)):
+            if accumulator is not None:
+                accumulator.add(hull)
+            if cumulative:
+                yield CuttingFrame(start + i, block[i + 1], frames[i + 1], hull, accumulator.parts, accumulator)
+            else:
+                yield CuttingFrame(start + i, block[i + 1], frames[i + 1], hull)
+
+
+def iter_cutting_frames(spec, cumulative=False, chunk_size=256):
+    """
+    Streams the rack cutter sweep of a gear, one CuttingFrame per step, as
+    generate() runs it. spec is a dict of generate() keyword arguments; those
+    that do not affect the sweep (engine, construction, stats) are ignored.
+    """
+    spec = dict(spec)
+    frame_count, tol = spec.pop('frame_count', 16), spec.pop('tol', None)
+    for key in ('engine', 'construction', 'stats'):
+        spec.pop(key, None)
+    rack = rack_cutter(**spec)
+    thetas = cutting_thetas(rack, frame_count, tol)
+    return cutting_frames(rack['profile'], rack['pitch_radius'], thetas, cumulative, chunk_size)
+
+
+def generate(teeth_count=8, module=2.0, pressure_angle=deg2rad(20.0), backlash=0.0, frame_count=16, profile_shift=0.5, clearance_factor=0.167, construction='sector', engine='sweep', tol=None, stats=None):
+    """
+    Generates a 2D gear profile using rack cutting principles, now with:
+    - Profile shifting (x)
+    - Adjustable clearance
+
+    Args:
+    - teeth_count: Number of teeth
+    - module: Defines gear size
+    - pressure_angle: Standardized pressure angle (default 20°)
+    - backlash: Space left between meshing teeth
+    - frame_count: Number of interpolation steps for smooth transition
+    - profile_shift: Amount of profile shift (x), default = 0 (standard gear)
+    - clearance_factor: Factor for clearance (default 0.167m)
+    - construction: 'sector' cuts one tooth space and rotates its outline around
+      the gear, 'loop' subtracts the tooth space from the whole gear N times
+    - engine: 'sweep' simulates the rack cutter with frame_count frames,
+      'analytic' evaluates the involute and trochoid directly and uses
+      frame_count as the number of samples per curve
+    - tol: Sweep engine only; when set, frame_count is ignored and enough
+      frames are used for the swept envelope to be within tol
+    - stats: Optional GenerateStats receiving parameters, stage timings and
+      geometry complexity
+    """
+    load_modules()
+    stats = stats if stats is not None else GenerateStats()
+    start = time.perf_counter()
+
+    # Step 1: Compute Correct Gear Parameters and the Rack Cutter Profile
+    rack = rack_cutter(teeth_count, module, pressure_angle, backlash, profile_shift, clearance_factor)
+    pitch_radius, outer_radius = rack['pitch_radius'], rack['outer_radius']
+
+    stats.params.update({
+        'pitch_diameter': rack['pitch_diameter'],
+        'pitch_radius': pitch_radius,
+        'base_radius': rack['base_radius'],
+        'addendum_radius': outer_radius,
+        'dedendum_radius': rack['root_radius'],
+        'tooth_thickness': rack['tooth_thickness'],
+        'profile_shift': profile_shift,
+    })
+    stats.times['parameters'] = time.perf_counter() - start
+
+    if engine == 'analytic':
+        with stats.stage('analytic_profile'):
+            chain = analytic_chain(teeth_count, pitch_radius, pressure_angle, rack['tooth_thickness'], rack['addendum'], rack['dedendum'], frame_count)
+        with stats.stage('tooth_assembly'):
+            gear_poly = shapely.Polygon(assemble_outline(chain, teeth_count))
+        stats.count('tooth_assembly', gear_poly)
+        return gear_poly, pitch_radius
+    elif engine != 'sweep':
+        raise ValueError(f"unknown engine: {engine!r}")
+
+    # Step 2-3: Generate Full Gear Using Rotation & Rack Cutting
+    with stats.stage('frame_sweep'):
+        thetas = cutting_thetas(rack, frame_count, tol)
+        accumulator = UnionAccumulator()
+        for frame in cutting_frames(rack['profile'], pitch_radius, thetas, accumulator=accumulator):
+            pass
+    stats.params['frame_count'] = len(thetas)
+    stats.count('frame_sweep', accumulator.parts, 2 * accumulator.count + accumulator.merges)
 
     # Step 4: Assemble the Full Gear
-    tooth_poly = unary_union(poly_list)
-    tooth_poly = tooth_poly.union(scale(tooth_poly, -1, 1, 1, Point(0., 0.)))
+    with stats.stage('hull_union'):
+        tooth_poly = accumulator.union()
+    stats.count('hull_union', tooth_poly)
 
-    gear_poly = Point(0., 0.).buffer(outer_radius)
-    for i in range(teeth_count):
-        gear_poly = rotate(gear_poly.difference(tooth_poly), (2 * np.pi) / teeth_count, Point(0., 0.), use_radians=True)
+    with stats.stage('mirror_union'):
+        tooth_poly = tooth_poly.union(shapely.affinity.scale(tooth_poly, -1, 1, 1, shapely.Point(0., 0.)))
+    stats.count('mirror_union', tooth_poly, 2)
+
+    with stats.stage('tooth_subtraction'):
+        gear_poly = None
+        if construction == 'sector':
+            gear_poly = cut_sector(tooth_poly, outer_radius, teeth_count, stats)
+        elif construction != 'loop':
+            raise ValueError(f"unknown construction mode: {construction!r}")
+
+        if gear_poly is None:
+            gear_poly = shapely.Point(0., 0.).buffer(outer_radius)
+            for i in range(teeth_count):
+                gear_poly = shapely.affinity.rotate(gear_poly.difference(tooth_poly), (2 * np.pi) / teeth_count, shapely.Point(0., 0.), use_radians=True)
+            stats.shapely_ops += 2 * teeth_count + 1
+    stats.count('tooth_subtraction', gear_poly, 0)
 
     return gear_poly, pitch_radius
 
 
-def main():
+def generate_internal(teeth_count=60, module=2.0, pressure_angle=deg2rad(20.0), backlash=0.0, frame_count=16, clearance_factor=0.167, cutter_teeth=None, rim_width=None, stats=None):
+    """
+    Generates an internal (ring) gear by simulating a pinion-shaper cutter
+    rolling inside the blank.
+
+    The cutter is an external involute gear from analytic_chain() with an
+    addendum of module + clearance, so that the ring root clears the tips of
+    mating pinions. Only one ring pitch of rolling is swept: rolling on by a
+    pitch turns the whole cut by a pitch, so the neighbouring cuts are rotated
+    copies. One tooth space is cut from a one-pitch annular wedge and repeated
+    around the ring as in the sector construction, which keeps the cost
+    independent of teeth_count.
+
+    Args:
+    - teeth_count: Number of ring teeth
+    - module, pressure_angle, frame_count, clearance_factor: Same as generate(),
+      frame_count being the number of cutter frames per ring pitch
+    - backlash: Passed to the cutter with generate()'s convention, so a positive
+      value thickens the cutter teeth and widens the ring tooth spaces
+    - cutter_teeth: Cutter tooth count (default: a third of teeth_count, 8 to 24)
+    - rim_width: Radial width of the ring beyond its root circle (default 2 * module)
+    - stats: Optional GenerateStats receiving parameters, stage timings and
+      geometry complexity
+
+    Returns the ring polygon (outer rim as exterior, teeth as the interior) and
+    its pitch radius.
+    """
+    load_modules()
+    stats = stats if stats is not None else GenerateStats()
+    start = time.perf_counter()
+
+    cutter_teeth = max(8, min(24, teeth_count // 3)) if cutter_teeth is None else cutter_teeth
+    if teeth_count - cutter_teeth < 4:
+        raise ValueError(f"the cutter ({cutter_teeth} teeth) needs at least 4 teeth fewer than the ring ({teeth_count})")
+    rim_width = 2 * module if rim_width is None else rim_width
+
+    pitch_radius = module * teeth_count / 2
+    cutter_radius = module * cutter_teeth / 2
+    center_distance = pitch_radius - cutter_radius
+    depth = module * (1 + clearance_factor)
+    inner_radius = pitch_radius - module  # Ring tip circle
+    outer_radius = pitch_radius + depth + rim_width
+    step = 2 * np.pi / teeth_count
+    stats.params.update({
+        'pitch_radius': pitch_radius,
+        'cutter_teeth': cutter_teeth,
+        'center_distance': center_distance,
+        'tip_radius': inner_radius,
+        'root_radius': pitch_radius + depth,
+        'outer_radius': outer_radius,
+    })
+    stats.times['parameters'] = time.perf_counter() - start
+
+    # One cutter tooth, pointing at +y, keeping only what reaches the ring material
+    with stats.stage('cutter'):
+        chain = analytic_chain(cutter_teeth, cutter_radius, pressure_angle, np.pi * module / 2 - backlash, depth, depth, frame_count)
+        cutter = rotations(assemble_outline(chain, cutter_teeth), -np.pi / cutter_teeth)  # Tooth, not space, at +y
+        tooth = cutter[np.abs(np.arctan2(cutter[:, 0], cutter[:, 1])) <= np.pi / cutter_teeth]
+        tooth = tooth[np.hypot(*tooth.T) >= cutter_radius - module]
+        cutter_outer = cutter_radius + depth
+
+    # Rolling range over which the tooth is inside the ring tip circle: it
+    # stays within window of the line of centres, seen from the cutter centre
+    with stats.stage('frame_sweep'):
+        cos_c = (center_distance ** 2 + cutter_outer ** 2 - inner_radius ** 2) / (2 * center_distance * cutter_outer)
+        window = np.pi - np.arccos(np.clip(cos_c, -1, 1)) + np.pi / cutter_teeth
+        ratio = pitch_radius / cutter_radius
+        phi_max = window / ratio
+        phis = np.linspace(-phi_max, phi_max, int(np.ceil(2 * phi_max / step * frame_count)) + 1)
+        hulls = swept_hulls(shaper_frames(tooth, center_distance, ratio, phis))
+    stats.params['frame_count'] = len(phis)
+    stats.count('frame_sweep', hulls, 2 * len(hulls))
+
+    # The cutter and the ring are conjugate, so this one tooth cuts the whole
+    # tooth space at +y and no other cutter tooth enters it
+    with stats.stage('hull_union'):
+        cut = shapely.union_all(hulls)
+    stats.count('hull_union', cut)
+
+    with stats.stage('tooth_subtraction'):
+        rim = arc(outer_radius, 0, 2 * np.pi, 64)[:-1]
+        a0, a1 = np.pi / 2 - step / 2, np.pi / 2 + step / 2
+        tip = arc(inner_radius, a0, a1)
+        wedge = shapely.Polygon(np.vstack([tip, arc(outer_radius, a1, a0)]))
+        sector = wedge.difference(shapely.union_all([shapely.affinity.rotate(cut, i * step, (0., 0.), use_radians=True) for i in (-1, 0, 1)]))
+        ring_poly = None
+        if isinstance(sector, shapely.Polygon):
+            try:
+                chain = sector_chain(sector, tip[0], tip[-1], (0., outer_radius))
+                ring_poly = shapely.Polygon(rim, [assemble_outline(chain, teeth_count)])
+            except ValueError:
+                pass
+        if ring_poly is None:
+            # Pointed or interfering teeth: subtract every cut from the whole annulus
+            annulus = shapely.Polygon(rim, [arc(inner_radius, 0, 2 * np.pi)[:-1]])
+            ring_poly = annulus.difference(shapely.union_all([shapely.affinity.rotate(cut, i * step, (0., 0.), use_radians=True) for i in range(teeth_count)]))
+        stats.shapely_ops += 6
+    stats.count('tooth_subtraction', ring_poly, 0)
+
+    return ring_poly, pitch_radius
+
+
+def spec_key(spec):
+    """Canonical form of a generate() spec, used to find identical specs. NumPy scalars count as their Python values."""
+    return json.dumps(spec, sort_keys=True, default=plain_value)
+
+
+def plain_value(value):
+    """Converts a NumPy scalar to the equivalent Python value for JSON encoding."""
+    if hasattr(value, 'item') and getattr(value, 'ndim', None) == 0:
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def generate_chunk(specs):
+    """Generates a list of specs in one worker, returning (spec, polygon, pitch_radius) tuples."""
+    return [(spec,) + generate(**spec) for spec in specs]
+
+
+def generate_many(specs, workers=None, chunk_size=None):
+    """
+    Generates many gears over a process pool, yielding results as they finish.
+
+    Args:
+    - specs: Iterable of dicts of generate() keyword arguments
+    - workers: Number of worker processes (default: CPU count); 1 runs in-process
+    - chunk_size: Number of specs sent to a worker at once (default: spread
+      the unique specs over four chunks per worker)
+
+    Yields (spec, polygon, pitch_radius) for every input spec, in completion
+    order. Identical specs are generated only once.
+    """
+    duplicates = {}
+    for spec in specs:
+        duplicates.setdefault(spec_key(spec), []).append(spec)
+    unique = [group[0] for group in duplicates.values()]
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        chunks = [[spec] for spec in unique]
+        results = map(generate_chunk, chunks)
+    else:
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+        chunk_size = chunk_size or max(1, -(-len(unique) // (4 * workers)))
+        chunks = [unique[i:i + chunk_size] for i in range(0, len(unique), chunk_size)]
+        pool = ProcessPoolExecutor(max_workers=workers)
+        results = (future.result() for future in as_completed([pool.submit(generate_chunk, chunk) for chunk in chunks]))
+
+    try:
+        for chunk in results:
+            for spec, polygon, pitch_radius in chunk:
+                for original in duplicates[spec_key(spec)]:
+                    yield original, polygon, pitch_radius
+    finally:
+        if workers != 1:
+            pool.shutdown(cancel_futures=True)
+
+
+OUTPUT_EXTENSIONS = {'dxf': '.dxf', 'text': '.txt', 'binary': '.gbin'}
+
+# Spec file columns (CLI long option names), with their types and generate() argument names
+SPEC_FIELDS = {
+    'teeth_count': (int, 'teeth_count'),
+    'module': (float, 'module'),
+    'pressure_angle': (float, 'pressure_angle'),
+    'backlash': (float, 'backlash'),
+    'profile_shift': (float, 'profile_shift'),
+    'clearance_factor': (float, 'clearance_factor'),
+    'frame_count': (int, 'frame_count'),
+    'tolerance': (float, 'tol'),
+    'engine': (str, 'engine'),
+    'construction': (str, 'construction'),
+    'output_type': (str, None),
+    'output_path': (str, None),
+}
+
+
+def write_output(path, output_type, gear_poly, dxf_version='R2000', precision=6, fit_tolerance=None):
+    """
+    Writes the gear to a file with the chosen backend, coordinates rounded to `precision` decimals.
+    With a fit_tolerance, DXF outlines are fitted with lines and arcs within that distance.
+    Binary files always hold the exact float64 coordinates.
+    The file is written next to path and renamed into place, so a failed
+    export leaves no partial file behind.
+    """
+    if output_type not in OUTPUT_EXTENSIONS:
+        raise ValueError(f"unknown output type: {output_type!r}")
+    backend = importlib.import_module(f'backends.{output_type}')
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, 'wb' if output_type == 'binary' else 'w') as f:
+            if output_type == 'binary':
+                backend.write(f, gear_poly)
+            elif output_type == 'dxf':
+                backend.write(f, gear_poly, dxf_version, precision, fit_tolerance)
+            else:
+                backend.write(f, gear_poly, precision)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def parse_spec(row):
+    """Converts one spec file row to a spec dict, raising ValueError on unknown fields or bad values."""
+    if not isinstance(row, dict):
+        raise ValueError(f"expected an object of fields, got {type(row).__name__}")
+    spec = {}
+    for key, value in row.items():
+        if key is None:
+            raise ValueError("more values than header columns")
+        key = key.strip().replace('-', '_')
+        if key not in SPEC_FIELDS:
+            raise ValueError(f"unknown field {key!r}")
+        if value is not None and value != '':
+            try:
+                spec[key] = SPEC_FIELDS[key][0](value)
+            except (TypeError, ValueError):
+                raise ValueError(f"invalid {key}: {value!r}") from None
+    return spec
+
+
+def read_specs(path):
+    """
+    Reads gear specs from a JSONL or CSV file.
+
+    Keys are the CLI long option names (with dashes or underscores); missing
+    values fall back to the CLI defaults. The pressure angle is in degrees.
+    Returns a list of (line number, spec dict, error) triples: a row that
+    cannot be parsed has no spec and an error message, so that it fails
+    alone instead of aborting the batch.
+    """
+    with open(path, newline='') as f:
+        if path.lower().endswith('.csv'):
+            import csv
+            rows = [(i + 2, row) for i, row in enumerate(csv.DictReader(f))]
+        else:
+            rows = [(i + 1, line) for i, line in enumerate(f) if line.strip()]
+
+    specs = []
+    for line, row in rows:
+        try:
+            specs.append((line, parse_spec(json.loads(row) if isinstance(row, str) else row), None))
+        except ValueError as e:
+            specs.append((line, None, str(e)))
+    return specs
+
+
+def run_batch_job(job):
+    """
+    Generates one batch gear and exports it to every target of the job.
+    Returns a (line, path, pitch_radius, seconds, error) tuple per target.
+    """
+    start = time.perf_counter()
+    try:
+        generator = generate
+        if job['cache_dir'] is not None:
+            from cache import DiskCache
+            generator = DiskCache(job['cache_dir']).generate
+        gear_poly, pitch_radius = generator(**job['params'])
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        return [(line, path, None, time.perf_counter() - start, error) for line, _, path in job['targets']]
+
+    results = []
+    for line, output_type, path in job['targets']:
+        try:
+            write_output(path, output_type, gear_poly, job['dxf_version'], job['precision'], job['fit_tolerance'])
+        except Exception as e:
+            results.append((line, path, None, time.perf_counter() - start, f"{type(e).__name__}: {e}"))
+        else:
+            results.append((line, path, pitch_radius, time.perf_counter() - start, None))
+    return results
+
+
+def batch_main(argv):
+    """Batch mode: generates every spec of a JSONL/CSV file in parallel and exports it."""
+    parser = argparse.ArgumentParser(prog='gear.py batch', description="Generate and export many gears from a JSONL or CSV spec file.")
+    parser.add_argument('specs', help="Spec file (.jsonl or .csv), one gear per line/row")
+    parser.add_argument('-d', '--out-dir', default='.', help="Directory for the exported files")
+    parser.add_argument('-j', '--jobs', type=int, default=None, help="Number of worker processes (default: CPU count)")
+    parser.add_argument('-t', '--output-type', choices=['dxf', 'text', 'binary'], default='dxf', help="Default output file format")
+    parser.add_argument('--dxf-version', choices=['R2000', 'R12'], default='R2000', help="DXF flavour: R2000 LWPOLYLINE rings or R12 LINE segments")
+    parser.add_argument('--precision', type=int, default=6, help="Number of decimals of the exported coordinates")
+    parser.add_argument('--fit-tolerance', type=float, default=None, help="Fit DXF outlines with lines and arcs within this distance")
+    parser.add_argument('--cache-dir', default=None, help="Directory of the persistent geometry cache")
+    args = parser.parse_args(argv)
+
+    defaults = dict(teeth_count=20, module=2.0, pressure_angle=20.0, backlash=0.1, profile_shift=0.0,
+                    clearance_factor=0.167, frame_count=16)
+    os.makedirs(args.out_dir, exist_ok=True)
+
+    specs = read_specs(args.specs)
+    jobs, failures = {}, 0
+    for index, (line, spec, error) in enumerate(specs):
+        if error is not None:
+            failures += 1
+            print(f"FAIL  line {line}: {error}")
+            continue
+        spec = {**defaults, **spec}
+        output_type = spec.pop('output_type', args.output_type)
+        name = spec.pop('output_path', f"gear_{index:04d}{OUTPUT_EXTENSIONS.get(output_type, '')}")
+        params = {SPEC_FIELDS[key][1]: value for key, value in spec.items()}
+        params['pressure_angle'] = deg2rad(params['pressure_angle'])
+        # Specs with the same generation parameters are generated once and exported to each of their paths
+        job = jobs.setdefault(spec_key(params), dict(params=params, targets=[], dxf_version=args.dxf_version, precision=args.precision,
+                                                      fit_tolerance=args.fit_tolerance, cache_dir=args.cache_dir))
+        job['targets'].append((line, output_type, os.path.join(args.out_dir, name)))
+
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    workers = args.jobs or os.cpu_count() or 1
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for future in as_completed([pool.submit(run_batch_job, job) for job in jobs.values()]):
+            for line, path, pitch_radius, seconds, error in future.result():
+                if error is None:
+                    print(f"ok    line {line}: {path} (pitch radius {pitch_radius:.3f}, {seconds * 1e3:.1f} ms)")
+                else:
+                    failures += 1
+                    print(f"FAIL  line {line}: {path}: {error}")
+
+    elapsed = time.perf_counter() - start
+    print(f"{len(specs) - failures}/{len(specs)} gears exported in {elapsed:.2f} s ({len(jobs)} generated, "
+          f"{len(jobs) / elapsed:.1f} gears/s, {workers} workers), {failures} failed")
+    return 1 if failures else 0
+
+
+def main(argv=None):
     """Main function to handle CLI arguments and generate the gear profile."""
-    parser = argparse.ArgumentParser(description="Generate 2D spur gear profiles with profile shifting and clearance.")
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ['batch']:
+        sys.exit(batch_main(argv[1:]))
+    if argv[:1] == ['planetary']:
+        from planetary import planetary_main
+        sys.exit(planetary_main(argv[1:]))
+
+    parser = argparse.ArgumentParser(description="Generate 2D spur gear profiles with profile shifting and clearance.",
+                                     epilog="Use 'gear.py batch SPECS' to generate many gears from a JSONL/CSV spec file "
+                                            "and 'gear.py planetary' to generate a planetary set.")
     parser.add_argument('-c', '--teeth-count', type=int, default=20, help="Number of teeth")
     parser.add_argument('-m', '--module', type=float, default=2.0, help="Module (Defines size of the gear)")
     parser.add_argument('-p', '--pressure-angle', type=float, default=20.0, help="Pressure angle in degrees")
@@ -112,25 +916,58 @@ def main():
     parser.add_argument('-x', '--profile-shift', type=float, default=0.0, help="Profile shift coefficient (x)")
     parser.add_argument('-cf', '--clearance-factor', type=float, default=0.167, help="Clearance factor (default 0.167m)")
     parser.add_argument('-n', '--frame-count', type=int, default=16, help="Number of frames for interpolation")
-    parser.add_argument('-t', '--output-type', choices=['dxf', 'text'], default='dxf', help="Output file format")
+    parser.add_argument('--tolerance', type=float, default=None, help="Use enough frames for this tolerance in mm (overrides --frame-count)")
+    parser.add_argument('-e', '--engine', choices=['sweep', 'analytic'], default='sweep', help="Profile engine")
+    parser.add_argument('--construction', choices=['sector', 'loop'], default='sector', help="Gear construction mode")
+    parser.add_argument('--internal', action='store_true', help="Generate an internal (ring) gear with a pinion-shaper cutter")
+    parser.add_argument('--cutter-teeth', type=int, default=None, help="Internal gears: number of shaper cutter teeth")
+    parser.add_argument('--rim-width', type=float, default=None, help="Internal gears: rim width beyond the root circle (default 2 * module)")
+    parser.add_argument('--cache-dir', default=None, help="Directory of the persistent geometry cache")
+    parser.add_argument('--stats', choices=['text', 'json'], default=None, help="Print parameters, stage timings and vertex counts")
+    parser.add_argument('-t', '--output-type', choices=['dxf', 'text', 'binary'], default='dxf', help="Output file format")
     parser.add_argument('-o', '--output-path', default='out', help="Output file name")
+    parser.add_argument('--dxf-version', choices=['R2000', 'R12'], default='R2000', help="DXF flavour: R2000 LWPOLYLINE rings or R12 LINE segments")
+    parser.add_argument('--precision', type=int, default=6, help="Number of decimals of the exported coordinates")
+    parser.add_argument('--fit-tolerance', type=float, default=None, help="Fit DXF outlines with lines and arcs within this distance")
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+    external = {'profile_shift': '-x/--profile-shift', 'engine': '--engine', 'construction': '--construction', 'tolerance': '--tolerance'}
+    internal = {'cutter_teeth': '--cutter-teeth', 'rim_width': '--rim-width'}
+    for dest, option in (external if args.internal else internal).items():
+        if getattr(args, dest) != parser.get_default(dest):
+            parser.error(f"{option} does not apply to {'internal' if args.internal else 'external'} gears")
 
     # Generate the gear
-    gear_poly, pitch_radius = generate(
-        args.teeth_count, args.module, deg2rad(args.pressure_angle),
-        args.backlash, args.frame_count, args.profile_shift, args.clearance_factor
-    )
+    generator = generate_internal if args.internal else generate
+    if args.cache_dir is not None:
+        from cache import DiskCache
+        generator = DiskCache(args.cache_dir, function=generator).generate
 
-    print(f'Generated gear with pitch radius = {pitch_radius:.3f}')
+    stats = GenerateStats()
+    if args.internal:
+        gear_poly, pitch_radius = generator(
+            args.teeth_count, args.module, deg2rad(args.pressure_angle),
+            args.backlash, args.frame_count, args.clearance_factor,
+            args.cutter_teeth, args.rim_width, stats
+        )
+    else:
+        gear_poly, pitch_radius = generator(
+            args.teeth_count, args.module, deg2rad(args.pressure_angle),
+            args.backlash, args.frame_count, args.profile_shift, args.clearance_factor,
+            args.construction, args.engine, args.tolerance, stats
+        )
+
+    if args.stats != 'json':
+        print(f'Generated gear with pitch radius = {pitch_radius:.3f}')
 
     # Write the shape to the output file
-    with open(args.output_path, 'w') as f:
-        if args.output_type == 'dxf':
-            backends.dxf.write(f, gear_poly)
-        elif args.output_type == 'text':
-            backends.text.write(f, gear_poly)
+    with stats.stage('export'):
+        write_output(args.output_path, args.output_type, gear_poly, args.dxf_version, args.precision, args.fit_tolerance)
+
+    if args.stats == 'json':
+        print(json.dumps(stats.as_dict()))
+    elif args.stats == 'text':
+        print(stats)
 
 
 if __name__ == "__main__":
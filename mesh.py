@@ -0,0 +1,356 @@
+"""Meshing analysis of a pair of generated gears: interference, clearance and backlash."""
+from gear import lazy_import, rotations
+
+np = lazy_import('numpy')
+shapely = lazy_import('shapely')
+
+
+def toothed_radii(gear, internal=False):
+    """Returns the smallest and largest radius of the toothed boundary of a gear."""
+    rings = gear.interiors if internal else [gear.exterior]
+    radii = np.hypot(*np.vstack([shapely.get_coordinates(ring) for ring in rings]).T)
+    return radii.min(), radii.max()
+
+
+def tooth_pieces(gear, teeth_count, internal=False):
+    """
+    Splits the toothed band of a gear into one polygon per tooth, each cut by a
+    one-pitch annular wedge centred on the tooth. Teeth are centred at
+    pi/2 + (k + 1/2) * pitch for external gears from generate() and at
+    pi/2 + k * pitch for internal gears from generate_internal().
+    """
+    pitch = 2 * np.pi / teeth_count
+    r_min, r_max = toothed_radii(gear, internal)
+    r_min, r_max = 0.98 * r_min, 1.02 * r_max
+    centers = np.pi / 2 + (np.arange(teeth_count) + (0.0 if internal else 0.5)) * pitch
+    t = centers[:, None] + np.linspace(-pitch / 2, pitch / 2, 17)[None, :]
+    wedges = shapely.polygons(np.concatenate([
+        r_max * np.stack([np.cos(t), np.sin(t)], axis=-1),
+        r_min * np.stack([np.cos(t[:, ::-1]), np.sin(t[:, ::-1])], axis=-1),
+    ], axis=1))
+    return shapely.intersection(gear, wedges), centers
+
+
+def facet_sagitta(coords, r_low, r_high, max_turn=0.5):
+    """
+    Largest sagitta of the facets of a closed outline strictly between radii
+    r_low and r_high, estimated as length * turn / 8 from the larger turn at
+    their ends. Vertices turning by more than max_turn radians are corners of
+    the outline rather than samples of a curve, and their facets are left out.
+    """
+    points = coords[:-1]
+    edges = np.roll(points, -1, axis=0) - points
+    heading = np.arctan2(edges[:, 1], edges[:, 0])
+    turn = np.abs((heading - np.roll(heading, 1) + np.pi) % (2 * np.pi) - np.pi)
+    radius = np.hypot(*points.T)
+    smooth = (radius > r_low * (1 + 1e-9)) & (radius < r_high * (1 - 1e-9)) & (turn < max_turn)
+    sagitta = np.hypot(*edges.T) * np.maximum(turn, np.roll(turn, -1)) / 8
+    return sagitta[smooth & np.roll(smooth, -1)].max(initial=0.0)
+
+
+class MeshAnalysis:
+    """
+    Result of analyze_mesh(), one entry per step of the mesh cycle.
+
+    Attributes:
+    - angles: Rotation of gear A in radians
+    - overlap: Overlap area of the two gears (0 when they do not collide)
+    - clearance: Minimum distance between the gears (0 when they touch or
+      collide, inf beyond the search distance)
+    - backlash: Circumferential play on the operating pitch circle, i.e. how far
+      gear B can turn both ways before touching A (None if not computed)
+    """
+
+    def __init__(self, angles, overlap, clearance, backlash=None, area_tol=1e-9):
+        self.angles = angles
+        self.overlap = overlap
+        self.clearance = clearance
+        self.backlash = backlash
+        self.area_tol = area_tol
+
+    @property
+    def interference(self):
+        """True if the gears overlap anywhere in the cycle."""
+        return bool(np.any(self.overlap > self.area_tol))
+
+    def as_dict(self):
+        summary = {'steps': len(self.angles), 'interference': self.interference,
+                   'max_overlap': float(self.overlap.max()), 'min_clearance': float(self.clearance.min())}
+        if self.backlash is not None:
+            summary.update(min_backlash=float(self.backlash.min()), max_backlash=float(self.backlash.max()))
+        return summary
+
+    def __str__(self):
+        return '\n'.join(f"{name}: {value:.6f}" if isinstance(value, float) else f"{name}: {value}"
+                         for name, value in self.as_dict().items())
+
+
+class MeshPair:
+    """
+    Poses gear B against gear A for many rotation angles at once.
+
+    Everything is expressed in the frame of gear A, so that A's tooth pieces
+    are prepared and indexed in an STRtree once, and only the few teeth of B
+    that can reach A are posed, as an (S, K, P, 2) coordinate array.
+
+    Args:
+    - gear_a, gear_b: Polygons in the orientation returned by generate()
+      (gear_a may be a ring from generate_internal() when internal is set)
+    - teeth_a, teeth_b: Tooth counts
+    - center_distance: Distance between the axes
+    - internal: Gear B meshes inside the ring gear A
+    - phase: Rotation of B about its centre at angle 0 (default: teeth interleaved)
+    """
+
+    def __init__(self, gear_a, gear_b, teeth_a, teeth_b, center_distance, internal=False, phase=None):
+        self.teeth_a, self.teeth_b = teeth_a, teeth_b
+        self.center_distance = center_distance
+        self.internal = internal
+        self.pitch_b = 2 * np.pi / teeth_b
+        # B's centre sits on +y, facing a tooth space of A; one of its teeth must face it
+        if phase is None:
+            phase = self.pitch_b / 2 if internal else np.pi - self.pitch_b / 2
+        self.phase = phase
+
+        self.pieces_a, _ = tooth_pieces(gear_a, teeth_a, internal)
+        self.pieces_a = self.pieces_a[~shapely.is_empty(self.pieces_a)]
+        shapely.prepare(self.pieces_a)
+        self.tree = shapely.STRtree(self.pieces_a)
+
+        pieces_b, centers_b = tooth_pieces(gear_b, teeth_b)
+        self.tooth_b = shapely.get_coordinates(pieces_b[0].exterior)
+        self.center_b = centers_b[0]
+
+        # Teeth of B whose tips can get past the toothed boundary of A
+        tip_b = toothed_radii(gear_b)[1]
+        reach_a = toothed_radii(gear_a, internal)[0 if internal else 1]
+        a = center_distance
+        if internal:
+            cos_g = (reach_a ** 2 - a ** 2 - tip_b ** 2) / (2 * a * tip_b)
+        else:
+            cos_g = (a ** 2 + tip_b ** 2 - reach_a ** 2) / (2 * a * tip_b)
+        # A tooth half a pitch past the window can still reach it with its flank
+        reach = int(np.ceil(np.arccos(np.clip(cos_g, -1, 1)) / self.pitch_b + 0.5))
+        self.neighbours = np.arange(-reach, reach + 1)
+
+        # Flank resolution where the tips of the other gear can reach, summed
+        # over both gears: how far a conjugate contact may be from touching
+        if internal:
+            band_a, band_b = (reach_a, a + tip_b), (reach_a - a, tip_b)
+        else:
+            band_a, band_b = (a - tip_b, reach_a), (a - reach_a, tip_b)
+        self.facet_sagitta = (facet_sagitta(shapely.get_coordinates(self.pieces_a[0].exterior), *band_a)
+                              + facet_sagitta(self.tooth_b, *band_b))
+
+    def pose_coords(self, angles, offsets=0.0):
+        """
+        Returns the (S, K, P, 2) tooth coordinates of B for rotations of A by
+        angles, with B turned by an extra offset (radians, counter-clockwise)
+        per step, or per step and tooth when offsets has shape (S, K).
+        """
+        ratio = self.teeth_a / self.teeth_b
+        centers = self.center_distance * np.column_stack([-np.sin(-angles), np.cos(-angles)])
+        if self.internal:
+            orientation = self.phase + angles * ratio - angles
+            facing = np.pi / 2 - angles
+        else:
+            orientation = self.phase - angles * ratio - angles
+            facing = -np.pi / 2 - angles
+        nearest = np.round((facing - self.center_b - orientation) / self.pitch_b)
+        turns = orientation[:, None] + (nearest[:, None] + self.neighbours[None, :]) * self.pitch_b
+        offsets = np.asarray(offsets)
+        turns = turns + (offsets[:, None] if offsets.ndim == 1 else offsets)
+        return rotations(self.tooth_b[None, None, :, :], -turns[:, :, None]) + centers[:, None, None, :]
+
+    def poses(self, angles, offsets=0.0):
+        """Returns the (S, K) tooth polygons of B, see pose_coords()."""
+        return shapely.polygons(self.pose_coords(angles, offsets))
+
+    def touching(self, polygons):
+        """Returns, per pose row, whether any tooth of B intersects A."""
+        rows, _ = self.tree.query(polygons.ravel(), predicate='intersects')
+        hit = np.zeros(polygons.shape[0], dtype=bool)
+        hit[rows // polygons.shape[1]] = True
+        return hit
+
+
+def analyze_mesh(gear_a, gear_b, teeth_a, teeth_b, center_distance, steps=360, internal=False, phase=None,
+                 search_distance=None, backlash=True, backlash_tol=1e-6):
+    """
+    Rotates two gears through one mesh cycle (one pitch of gear A) at the given
+    center distance and measures, at every step, the overlap area, the minimum
+    clearance and optionally the backlash.
+
+    Args:
+    - gear_a, gear_b, teeth_a, teeth_b, center_distance, internal, phase: See MeshPair
+    - steps: Number of rotation angles in the cycle
+    - search_distance: Clearances beyond this are reported as inf (default: a
+      quarter of the circular pitch)
+    - backlash: Also find, by vectorized bisection over all steps, how far B can
+      turn each way before touching A
+    - backlash_tol: Angular tolerance of the bisection in radians
+
+    Returns a MeshAnalysis.
+    """
+    pair = MeshPair(gear_a, gear_b, teeth_a, teeth_b, center_distance, internal, phase)
+    angles = np.linspace(0, 2 * np.pi / teeth_a, steps, endpoint=False)
+    op_radius_b = center_distance * teeth_b / abs(teeth_a + (-teeth_b if internal else teeth_b))
+    if search_distance is None:
+        search_distance = op_radius_b * pair.pitch_b / 4
+
+    polygons = pair.poses(angles)
+    flat = polygons.ravel()
+    rows, cols = pair.tree.query(flat, predicate='intersects')
+    areas = shapely.area(shapely.intersection(flat[rows], pair.pieces_a[cols]))
+    overlap = np.bincount(rows // polygons.shape[1], areas, minlength=steps)
+
+    rows, cols = pair.tree.query(flat, predicate='dwithin', distance=search_distance)
+    clearance = np.full(steps, np.inf)
+    np.minimum.at(clearance, rows // polygons.shape[1], shapely.distance(flat[rows], pair.pieces_a[cols]))
+
+    play = None
+    if backlash:
+        play = np.zeros(steps)
+        for sign in (1, -1):
+            lo, hi = np.zeros(steps), np.full(steps, pair.pitch_b / 2)
+            for _ in range(int(np.ceil(np.log2(pair.pitch_b / 2 / backlash_tol)))):
+                mid = (lo + hi) / 2
+                hit = pair.touching(pair.poses(angles, sign * mid))
+                hi = np.where(hit, mid, hi)
+                lo = np.where(hit, lo, mid)
+            play += lo
+        play = np.where(overlap > 0, 0.0, play * op_radius_b)
+
+    return MeshAnalysis(angles, overlap, clearance, play)
+
+
+class TransmissionError:
+    """
+    Result of transmission_errors(), one row per gear pair and one column per
+    step of its mesh cycle.
+
+    Attributes:
+    - angles: (D, S) rotations of the driver A in radians
+    - te: (D, S) angular deviation of the driven gear B from the ideal ratio in
+      radians, negative when B lags behind (constant for conjugate profiles)
+    - contacts: (D, S) number of tooth pairs in contact
+    - spectrum: (D, S // 2 + 1) amplitude of the transmission error at each
+      harmonic of the mesh frequency (index 0 is the mean)
+    - op_radius: (D,) operating pitch radius of B, to express te as a length
+    - contact_tol: (D,) angular distance in radians of B within which a tooth
+      was counted as in contact
+    """
+
+    def __init__(self, angles, te, contacts, spectrum, op_radius, contact_tol):
+        self.angles = angles
+        self.te = te
+        self.contacts = contacts
+        self.spectrum = spectrum
+        self.op_radius = op_radius
+        self.contact_tol = contact_tol
+
+    @property
+    def peak_to_peak(self):
+        """(D,) peak-to-peak transmission error in radians of B."""
+        return self.te.max(axis=1) - self.te.min(axis=1)
+
+    @property
+    def contact_ratio(self):
+        """(D,) effective contact ratio, the mean number of tooth pairs in contact."""
+        return self.contacts.mean(axis=1)
+
+    def as_dict(self):
+        return {'peak_to_peak': self.peak_to_peak.tolist(),
+                'peak_to_peak_linear': (self.peak_to_peak * self.op_radius).tolist(),
+                'contact_ratio': self.contact_ratio.tolist(),
+                'contact_tol': self.contact_tol.tolist(),
+                'mesh_harmonics': self.spectrum[:, 1:4].tolist()}
+
+    def __str__(self):
+        lines = [f"{'pair':>4} {'TE p-p [rad]':>13} {'TE p-p [len]':>13} {'contact':>8} {'tol [rad]':>10} {'1x mesh':>10} {'2x mesh':>10}"]
+        for i, (ptp, ratio) in enumerate(zip(self.peak_to_peak, self.contact_ratio)):
+            lines.append(f"{i:>4} {ptp:>13.3e} {ptp * self.op_radius[i]:>13.3e} {ratio:>8.3f} {self.contact_tol[i]:>10.3e} "
+                         f"{self.spectrum[i, 1]:>10.3e} {self.spectrum[i, 2]:>10.3e}")
+        return '\n'.join(lines)
+
+
+def transmission_errors(pairs, steps=256, reverse=False, tol=1e-7, contact_tol=None, spacing=None):
+    """
+    Kinematic transmission error of many gear pairs at once. Gear A drives: at
+    every step of its mesh cycle, each posed tooth of B is turned back against
+    the direction of motion until it touches A, by one bisection run on all
+    pairs, steps and teeth together. The driven position is set by the first
+    tooth to touch, and every tooth touching within contact_tol of it counts
+    as a contact.
+
+    The pairs are laid side by side in a single STRtree, so each bisection
+    iteration is one tree query however many pairs are screened. Pairs need
+    some backlash: where the nominal pose already touches, the deviation is 0.
+
+    Args:
+    - pairs: MeshPair objects
+    - steps: Number of rotation angles in the mesh cycle of each pair
+    - reverse: Drive A the other way, loading the opposite flanks
+    - tol: Angular tolerance of the bisection in radians
+    - contact_tol: Angular distance in radians within which a tooth counts as
+      touching. By default, the facet sagitta of both flanks of each pair
+      (MeshPair.facet_sagitta) over the operating pitch radius of B, plus tol:
+      conjugate flanks drawn as polygons touch within that distance. Swept
+      flanks deviate from the involute by more than their facets, by the hull
+      chords of the sweep, so they count about one pair in contact unless a
+      contact_tol as large as that deviation is given.
+    - spacing: Distance between the pairs in the shared tree (default: enough
+      to keep them apart)
+
+    Returns a TransmissionError.
+    """
+    pairs = list(pairs)
+    if spacing is None:
+        spacing = 4 * max(pair.center_distance + np.hypot(*pair.tooth_b.T).max() for pair in pairs)
+    shifts = spacing * np.arange(len(pairs))
+    tree = shapely.STRtree(np.concatenate([shapely.transform(pair.pieces_a, lambda c, x=x: c + [x, 0.0])
+                                           for pair, x in zip(pairs, shifts)]))
+
+    angles = np.stack([np.linspace(0, 2 * np.pi / pair.teeth_a, steps, endpoint=False) for pair in pairs])
+    # Turning B back against its motion: its orientation decreases with the
+    # driver angle for external pairs and increases for internal ones
+    signs = np.array([(1.0 if pair.internal else -1.0) * (-1.0 if reverse else 1.0) for pair in pairs])
+    sizes = np.array([steps * len(pair.neighbours) for pair in pairs])
+    starts = np.concatenate([[0], np.cumsum(sizes)])
+    lo, hi = np.zeros(starts[-1]), np.concatenate([np.full(size, pair.pitch_b / 2) for pair, size in zip(pairs, sizes)])
+
+    for _ in range(int(np.ceil(np.log2(max(pair.pitch_b for pair in pairs) / 2 / tol)))):
+        mid = (lo + hi) / 2
+        polygons = np.concatenate([
+            shapely.polygons(pair.pose_coords(angles[d], -signs[d] * mid[starts[d]:starts[d + 1]].reshape(steps, -1))
+                             + [shifts[d], 0.0]).ravel()
+            for d, pair in enumerate(pairs)])
+        hit = np.zeros(len(polygons), dtype=bool)
+        hit[tree.query(polygons, predicate='intersects')[0]] = True
+        hi = np.where(hit, mid, hi)
+        lo = np.where(hit, lo, mid)
+
+    op_radius = np.array([pair.center_distance * pair.teeth_b / abs(pair.teeth_a + (-pair.teeth_b if pair.internal else pair.teeth_b))
+                          for pair in pairs])
+    if contact_tol is None:
+        contact_tol = np.array([pair.facet_sagitta for pair in pairs]) / op_radius + tol
+    contact_tol = np.broadcast_to(np.asarray(contact_tol, dtype=float), (len(pairs),))
+
+    te, contacts = np.empty((len(pairs), steps)), np.empty((len(pairs), steps))
+    for d, pair in enumerate(pairs):
+        lag = lo[starts[d]:starts[d + 1]].reshape(steps, -1)
+        first = lag.min(axis=1)
+        te[d] = -first
+        contacts[d] = (lag - first[:, None] <= contact_tol[d]).sum(axis=1)
+
+    spectrum = np.abs(np.fft.rfft(te, axis=1)) / steps
+    spectrum[:, 1:] *= 2
+    return TransmissionError(angles, te, contacts, spectrum, op_radius, contact_tol)
+
+
+def analyze_transmission(gear_a, gear_b, teeth_a, teeth_b, center_distance, steps=256, internal=False, phase=None, **kwargs):
+    """
+    Transmission error, spectrum and contact ratio of a single gear pair, see
+    transmission_errors() for the keyword arguments.
+    """
+    return transmission_errors([MeshPair(gear_a, gear_b, teeth_a, teeth_b, center_distance, internal, phase)], steps, **kwargs)
@@ -0,0 +1,178 @@
+"""Planetary gear sets: a sun, equally spaced identical planets and a ring."""
+import argparse
+import math
+import os
+import sys
+
+from gear import GenerateStats, deg2rad, generate, generate_internal, lazy_import, load_modules, write_output, OUTPUT_EXTENSIONS
+
+np = lazy_import('numpy')
+shapely = lazy_import('shapely')
+
+
+def check_planetary(sun_teeth, planet_teeth, ring_teeth, planet_count):
+    """
+    Checks the conditions of a planetary set with standard (unshifted) gears
+    and equally spaced planets, raising ValueError when one fails:
+    - mesh (coaxiality): the ring has sun_teeth + 2 * planet_teeth teeth
+    - assembly: (sun_teeth + ring_teeth) / planet_count is an integer, so that
+      every planet meshes with the sun and the ring at once
+    - neighbours: the tip circles of adjacent planets do not overlap
+    """
+    if min(sun_teeth, planet_teeth, planet_count) < 1:
+        raise ValueError("tooth and planet counts must be positive")
+    if ring_teeth != sun_teeth + 2 * planet_teeth:
+        raise ValueError(f"mesh condition: ring needs {sun_teeth + 2 * planet_teeth} teeth (sun + 2 * planet), got {ring_teeth}")
+    if (sun_teeth + ring_teeth) % planet_count:
+        raise ValueError(f"assembly condition: (sun + ring) = {sun_teeth + ring_teeth} teeth is not divisible by {planet_count} planets")
+    if planet_count > 1 and (sun_teeth + planet_teeth) * math.sin(math.pi / planet_count) <= planet_teeth + 2:
+        raise ValueError(f"neighbour condition: {planet_count} planets with {planet_teeth} teeth collide with each other")
+
+
+def planet_phases(sun_teeth, planet_teeth, ring_teeth, planet_count):
+    """
+    Places the planets of an assembled set, the sun being in the orientation
+    returned by generate() (a tooth space centred on +y).
+
+    Returns the carrier angles of the planets, the rotation of each planet
+    about its own centre and the rotation of the ring, all counter-clockwise in
+    radians, such that every planet meshes with both the sun and the ring.
+    """
+    carrier = (2 * np.pi / planet_count) * np.arange(planet_count)
+    sun_pitch, planet_pitch, ring_pitch = 2 * np.pi / sun_teeth, 2 * np.pi / planet_teeth, 2 * np.pi / ring_teeth
+
+    # Fraction of a pitch between the sun tooth space centred at pi / 2 and the
+    # contact point, 0 for a space and 0.5 for a tooth. The planet surface runs
+    # the other way at the contact, so it must show the complementary fraction.
+    sun_fraction = np.mod(carrier - np.pi / 2, sun_pitch) / sun_pitch
+    planets = np.mod(carrier + np.pi / 2 - (0.5 - sun_fraction) * planet_pitch, planet_pitch)
+
+    # The ring from generate_internal() also has a tooth space centred on +y.
+    # Ring and planet surfaces run the same way at the outer contact, so a
+    # planet tooth (fraction 0.5) must face a ring space (fraction 0).
+    planet_fraction = np.mod(carrier[0] - np.pi / 2 - planets[0], planet_pitch) / planet_pitch
+    ring = np.mod(carrier[0] - np.pi / 2 - (planet_fraction - 0.5) * ring_pitch, ring_pitch)
+    return carrier, planets, ring
+
+
+class PlanetarySet:
+    """
+    Geometry of an assembled planetary set, centred on the sun.
+
+    Attributes:
+    - sun, ring: Polygons of the sun and the ring
+    - planets: Polygons of the planets, placed on the carrier
+    - planet: The single generated planet, centred at the origin
+    - center_distance: Distance between the sun and planet axes
+    - carrier_angles, planet_rotations, ring_rotation: Phase angles in radians
+    - ratio: Sun to carrier reduction with the ring held fixed
+    """
+
+    def __init__(self, sun, planet, ring, planets, center_distance, carrier_angles, planet_rotations, ring_rotation, ratio):
+        self.sun = sun
+        self.planet = planet
+        self.ring = ring
+        self.planets = planets
+        self.center_distance = center_distance
+        self.carrier_angles = carrier_angles
+        self.planet_rotations = planet_rotations
+        self.ring_rotation = ring_rotation
+        self.ratio = ratio
+
+    def parts(self):
+        """Returns (name, polygon) pairs of every part."""
+        return [('sun', self.sun)] + [(f'planet{i + 1}', p) for i, p in enumerate(self.planets)] + [('ring', self.ring)]
+
+
+def generate_planetary(sun_teeth=20, planet_teeth=16, planet_count=4, module=2.0, pressure_angle=deg2rad(20.0), backlash=0.0,
+                       frame_count=16, clearance_factor=0.167, ring_teeth=None, rim_width=None, generator=generate, stats=None, **kwargs):
+    """
+    Generates a planetary set after checking its mesh, assembly and neighbour
+    conditions. The planet is generated once and every planet is a rotated and
+    translated copy of it, so the cost does not grow with planet_count.
+
+    The ring is cut by generate_internal() with a shaper cutter that has the
+    planet's tooth count.
+
+    Args:
+    - sun_teeth, planet_teeth, planet_count: Tooth and planet counts
+    - module, pressure_angle, frame_count, clearance_factor: Same as generate()
+    - backlash: Circumferential play of every mesh on the pitch circles
+    - ring_teeth: Ring tooth count, sun_teeth + 2 * planet_teeth by default
+    - rim_width: Radial width of the ring beyond its root circle (default 2 * module)
+    - generator: External gear generator, e.g. a cache's generate method
+    - stats: Optional GenerateStats receiving one stage per part
+    - kwargs: Passed on to the external gear generator (engine, construction, tol)
+    """
+    load_modules()
+    stats = stats if stats is not None else GenerateStats()
+    ring_teeth = sun_teeth + 2 * planet_teeth if ring_teeth is None else ring_teeth
+    check_planetary(sun_teeth, planet_teeth, ring_teeth, planet_count)
+
+    # generate()'s backlash thins the rack cutter, which thickens the teeth it
+    # cuts: external gears get -backlash / 2 so that each mesh has `backlash`
+    # of play, and the ring's shaper cutter +backlash / 2 to widen its spaces.
+    params = dict(module=module, pressure_angle=pressure_angle, frame_count=frame_count,
+                  profile_shift=0.0, clearance_factor=clearance_factor, **kwargs)
+    with stats.stage('sun'):
+        sun, sun_radius = generator(sun_teeth, backlash=-backlash / 2, **params)
+    with stats.stage('planet'):
+        planet, planet_radius = generator(planet_teeth, backlash=-backlash / 2, **params)
+    with stats.stage('ring'):
+        ring, ring_radius = generate_internal(ring_teeth, module, pressure_angle, backlash / 2, frame_count, clearance_factor,
+                                              cutter_teeth=planet_teeth, rim_width=rim_width)
+        carrier, rotations, ring_rotation = planet_phases(sun_teeth, planet_teeth, ring_teeth, planet_count)
+        ring = shapely.affinity.rotate(ring, ring_rotation, (0., 0.), use_radians=True)
+
+    with stats.stage('placement'):
+        center_distance = sun_radius + planet_radius
+        planets = [
+            shapely.affinity.translate(shapely.affinity.rotate(planet, rotation, (0., 0.), use_radians=True),
+                                       center_distance * np.cos(angle), center_distance * np.sin(angle))
+            for angle, rotation in zip(carrier, rotations)
+        ]
+    stats.params.update({'center_distance': center_distance, 'ring_teeth': ring_teeth, 'ratio': 1 + ring_teeth / sun_teeth})
+    return PlanetarySet(sun, planet, ring, planets, center_distance, carrier, rotations, ring_rotation, 1 + ring_teeth / sun_teeth)
+
+
+def planetary_main(argv):
+    """Planetary mode: generates a sun, planets and ring and exports one file per part."""
+    parser = argparse.ArgumentParser(prog='gear.py planetary', description="Generate an assembled planetary gear set.")
+    parser.add_argument('-s', '--sun-teeth', type=int, default=20, help="Number of sun teeth")
+    parser.add_argument('-P', '--planet-teeth', type=int, default=16, help="Number of planet teeth")
+    parser.add_argument('-N', '--planet-count', type=int, default=4, help="Number of planets")
+    parser.add_argument('-r', '--ring-teeth', type=int, default=None, help="Number of ring teeth (default: sun + 2 * planet)")
+    parser.add_argument('-m', '--module', type=float, default=2.0, help="Module (Defines size of the gears)")
+    parser.add_argument('-p', '--pressure-angle', type=float, default=20.0, help="Pressure angle in degrees")
+    parser.add_argument('-b', '--backlash', type=float, default=0.1, help="Backlash")
+    parser.add_argument('-cf', '--clearance-factor', type=float, default=0.167, help="Clearance factor (default 0.167m)")
+    parser.add_argument('-n', '--frame-count', type=int, default=16, help="Number of frames for interpolation")
+    parser.add_argument('--rim-width', type=float, default=None, help="Ring rim width beyond the root circle (default 2 * module)")
+    parser.add_argument('-e', '--engine', choices=['sweep', 'analytic'], default='sweep', help="Profile engine")
+    parser.add_argument('--stats', choices=['text'], default=None, help="Print stage timings")
+    parser.add_argument('-t', '--output-type', choices=sorted(OUTPUT_EXTENSIONS), default='dxf', help="Output file format")
+    parser.add_argument('-o', '--output-path', default='planetary', help="Output file prefix, one file per part")
+    parser.add_argument('--dxf-version', choices=['R2000', 'R12'], default='R2000', help="DXF flavour: R2000 LWPOLYLINE rings or R12 LINE segments")
+    args = parser.parse_args(argv)
+
+    stats = GenerateStats()
+    try:
+        gearset = generate_planetary(args.sun_teeth, args.planet_teeth, args.planet_count, args.module, deg2rad(args.pressure_angle),
+                                     args.backlash, args.frame_count, args.clearance_factor, args.ring_teeth, args.rim_width,
+                                     engine=args.engine, stats=stats)
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+
+    with stats.stage('export'):
+        for name, polygon in gearset.parts():
+            path = f"{args.output_path}_{name}{OUTPUT_EXTENSIONS[args.output_type]}"
+            write_output(path, args.output_type, polygon, args.dxf_version)
+
+    print(f"Generated planetary set: center distance = {gearset.center_distance:.3f}, ratio = {gearset.ratio:.4f} (ring fixed)")
+    for angle, rotation in zip(gearset.carrier_angles, gearset.planet_rotations):
+        print(f"  planet at {np.degrees(angle):7.2f} deg, phase {np.degrees(rotation):7.3f} deg")
+    print(f"  ring phase {np.degrees(gearset.ring_rotation):.3f} deg, files {os.path.abspath(args.output_path)}_*")
+    if args.stats == 'text':
+        print(stats)
+    return 0
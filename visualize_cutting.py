@@ -1,81 +1,58 @@
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.animation as animation
-from shapely.geometry import MultiPoint
-from shapely.affinity import rotate
-from gear import rotation, generate  # Import from main gear script
-import matplotlib.widgets as widgets
+from gear import deg2rad, iter_cutting_frames, rack_cutter  # Import from main gear script
+
+FRAME_NAME = 'frame_%05d.png'  # File names of exported frames
+
 
 # ===========================
 # CONFIGURATION
 # ===========================
-teeth_count = 20  # Number of teeth
-module = 2.0  # Module (size factor)
-pressure_angle_deg = 20.0  # Pressure angle in degrees
-backlash = 0.1  # Backlash
-frame_count = 16  # Number of steps for smoother interpolation
-profile_shift = 0.0  # Profile shift coefficient
-clearance_factor = 0.167  # Clearance factor
+def cutting_spec(args):
+    """Returns the generate() keyword arguments of the animated gear."""
+    return {
+        'teeth_count': args.teeth_count,  # Number of teeth
+        'module': args.module,  # Module (size factor)
+        'pressure_angle': deg2rad(args.pressure_angle),
+        'backlash': args.backlash,
+        'frame_count': args.frame_count,  # Number of steps for smoother interpolation
+        'profile_shift': args.profile_shift,  # Profile shift coefficient
+        'clearance_factor': args.clearance_factor,
+    }
 
-# ===========================
-# COMPUTE GEAR PARAMETERS
-# ===========================
-pressure_angle = np.radians(pressure_angle_deg)
-pitch_radius = (teeth_count * module) / 2
-circular_pitch = np.pi * module
-base_radius = pitch_radius * np.cos(pressure_angle)
-tooth_thickness = (circular_pitch / 2) - backlash
-addendum = module
-clearance = clearance_factor * module
-dedendum = module + clearance
-outer_radius = pitch_radius + addendum
-root_radius = pitch_radius - dedendum
 
-# ===========================
-# DEFINE TRAPEZOID CUTTER PROFILE
-# ===========================
-profile = np.array([
-    [-(0.5 * tooth_thickness + addendum * np.tan(pressure_angle)),  addendum],
-    [-(0.5 * tooth_thickness - dedendum * np.tan(pressure_angle)), -dedendum],
-    [(0.5 * tooth_thickness - dedendum * np.tan(pressure_angle)), -dedendum],
-    [(0.5 * tooth_thickness + addendum * np.tan(pressure_angle)),  addendum]
-])
+def spec_rack(spec):
+    """Computes the gear parameters of a spec."""
+    return rack_cutter(spec['teeth_count'], spec['module'], spec['pressure_angle'], spec['backlash'],
+                       spec['profile_shift'], spec['clearance_factor'])
 
-l = 2 * tooth_thickness / pitch_radius  # Small angular step per frame
-angles = np.linspace(0, l, frame_count)
 
 # ===========================
 # PLOTTING SETUP
 # ===========================
-fig, ax = plt.subplots(figsize=(6, 6))
-ax.set_xlim(-pitch_radius * 1.5, pitch_radius * 1.5)
-ax.set_ylim(-pitch_radius * 1.5, pitch_radius * 1.5)
-ax.set_aspect('equal')
-ax.set_title("Step-by-Step Gear Cutting Process")
-ax.set_xlabel("X-axis")
-ax.set_ylabel("Y-axis")
-ax.grid(True)
-
-# Store cutter shapes for animation
-trapezes = []
-prev_X = None
-
-for theta in angles:
-    X = rotation(profile + np.array([-theta * pitch_radius, pitch_radius]), theta)
-    if prev_X is not None:
-        trapezes.append(MultiPoint([x for x in X] + [x for x in prev_X]).convex_hull)
-    prev_X = X
-
-# ===========================
-# ANIMATION FUNCTION
-# ===========================
-trapeze_patches = []
-paused = False  # Pause flag
+def setup_axes(fig, rack):
+    """
+    Draws the static content of the animation into fig. Returns the axes, the
+    persistent collection holding every trapeze so far and the one used to
+    paint the latest trapeze.
 
+    The collection is drawn on full redraws (start, resize, button clicks).
+    Between those, each frame only paints the new trapeze over the canvas with
+    the animated `latest` collection, so a frame costs the same at step 2000 as at
+    step 1. (FuncAnimation's blitting restores a fixed background every frame,
+    which would mean redrawing every trapeze so far.)
+    """
+    from matplotlib.collections import PolyCollection
+    from matplotlib.patches import Circle
 
-def update(frame):
-    """Draws each step of the cutting process."""
-    ax.clear()
+    pitch_radius = rack['pitch_radius']
+    ax = fig.add_subplot()
     ax.set_xlim(-pitch_radius * 1.5, pitch_radius * 1.5)
     ax.set_ylim(-pitch_radius * 1.5, pitch_radius * 1.5)
     ax.set_aspect('equal')
@@ -83,54 +60,198 @@ def update(frame):
     ax.set_xlabel("X-axis")
     ax.set_ylabel("Y-axis")
     ax.grid(True)
-
-    for i in range(frame + 1):  # Draw each trapeze up to current step
-        patch = plt.Polygon(np.array(trapezes[i].exterior.coords), edgecolor='black', facecolor='gray', alpha=0.6)
-        ax.add_patch(patch)
+    ax.set_axisbelow(True)  # Trapezes painted one by one must cover the grid as a full redraw does
 
     # Draw base gear blank (circle)
-    circle = plt.Circle((0, 0), outer_radius, color='lightblue', fill=False, linestyle='dashed')
-    ax.add_patch(circle)
+    ax.add_patch(Circle((0, 0), rack['outer_radius'], color='lightblue', fill=False, linestyle='dashed'))
 
-    return trapeze_patches
+    # Both collections render the same way, so that painted and redrawn trapezes match
+    trapezes = PolyCollection([], edgecolor='black', facecolor='gray', alpha=0.6)
+    ax.add_collection(trapezes)
+    latest = PolyCollection([], edgecolor='black', facecolor='gray', alpha=0.6, animated=True)
+    ax.add_collection(latest)
+    return ax, trapezes, latest
 
 
-def toggle_animation(event):
-    """Pauses and resumes the animation."""
-    global paused
-    if paused:
-        ani.event_source.start()  # Resume animation
-        paused = False
-        pause_button.label.set_text("Pause")
-    else:
-        ani.event_source.stop()  # Pause animation
-        paused = True
-        pause_button.label.set_text("Resume")
+def add_trapeze(trapezes, latest, frame):
+    """Appends the trapeze of a cutting step to the collection and makes it the latest one."""
+    from matplotlib.path import Path
 
-
-def restart_animation(event):
-    """Restarts the animation from the beginning."""
-    global paused
-    paused = False
-    ani.event_source.stop()
-    ani.frame_seq = ani.new_frame_seq()  # Reset frames
-    ani.event_source.start()
-    pause_button.label.set_text("Pause")
+    path = Path(np.asarray(frame.hull.exterior.coords), closed=True)
+    path.should_simplify = False  # A lone path would be simplified, the full collection is not
+    trapezes.get_paths().append(path)
+    latest.get_paths()[:] = [path]
 
 
 # ===========================
-# ADDING UI CONTROLS
+# INTERACTIVE ANIMATION
 # ===========================
-ax_pause = plt.axes([0.7, 0.02, 0.1, 0.05])
-pause_button = widgets.Button(ax_pause, "Pause")
-pause_button.on_clicked(toggle_animation)
+def show_animation(spec):
+    """Animates the cutting process in a window, with Pause and Restart buttons."""
+    import matplotlib.pyplot as plt
+    import matplotlib.widgets as widgets
+
+    fig = plt.figure(figsize=(6, 6))
+    ax, trapezes, latest = setup_axes(fig, spec_rack(spec))
+
+    # Spread the animation over about 8 seconds, at most 100 frames per second
+    interval = min(500, max(10, 8000 // spec['frame_count']))
+    timer = fig.canvas.new_timer(interval=interval)
+    state = {'steps': iter_cutting_frames(spec), 'paused': False}
+
+    def update():
+        """Draws one step of the cutting process: only the new trapeze is painted and blitted."""
+        frame = next(state['steps'], None)
+        if frame is None:
+            timer.stop()
+            return
+        add_trapeze(trapezes, latest, frame)
+        if fig.canvas.supports_blit:
+            ax.draw_artist(latest)
+            fig.canvas.blit(ax.bbox)
+        else:
+            fig.canvas.draw_idle()
+
+    def toggle_animation(event):
+        """Pauses and resumes the animation."""
+        if state['paused']:
+            timer.start()  # Resume animation
+            state['paused'] = False
+            pause_button.label.set_text("Pause")
+        else:
+            timer.stop()  # Pause animation
+            state['paused'] = True
+            pause_button.label.set_text("Resume")
+        fig.canvas.draw_idle()
+
+    def restart_animation(event):
+        """Restarts the animation from the beginning."""
+        timer.stop()
+        state['steps'] = iter_cutting_frames(spec)  # Reset frames
+        trapezes.set_verts([])
+        state['paused'] = False
+        pause_button.label.set_text("Pause")
+        fig.canvas.draw_idle()
+        timer.start()
+
+    # Adding UI controls
+    ax_pause = fig.add_axes([0.7, 0.02, 0.1, 0.05])
+    pause_button = widgets.Button(ax_pause, "Pause")
+    pause_button.on_clicked(toggle_animation)
+
+    ax_restart = fig.add_axes([0.81, 0.02, 0.1, 0.05])
+    restart_button = widgets.Button(ax_restart, "Restart")
+    restart_button.on_clicked(restart_animation)
+
+    # Run animation
+    timer.add_callback(update)
+    timer.start()
+    plt.show()
 
-ax_restart = plt.axes([0.81, 0.02, 0.1, 0.05])
-restart_button = widgets.Button(ax_restart, "Restart")
-restart_button.on_clicked(restart_animation)
 
 # ===========================
-# RUN ANIMATION
+# HEADLESS EXPORT
 # ===========================
-ani = animation.FuncAnimation(fig, update, frames=len(trapezes), repeat=False, interval=500)
-plt.show()
\ No newline at end of file
+def render_range(job):
+    """
+    Renders the frames [start, stop) of a cutting animation off-screen with the
+    Agg backend and saves them as PNG files in directory. Every trapeze, also
+    those before start, is painted on its own over the static content, so the
+    frames do not depend on how the animation was split into ranges.
+    Returns the number of frames written.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    from PIL import Image
+
+    fig = Figure(figsize=(job['size'], job['size']), dpi=job['dpi'])
+    canvas = FigureCanvasAgg(fig)
+    ax, trapezes, latest = setup_axes(fig, spec_rack(job['spec']))
+    canvas.draw()
+
+    for frame in iter_cutting_frames(job['spec']):
+        if frame.index >= job['stop']:
+            break
+        add_trapeze(trapezes, latest, frame)
+        ax.draw_artist(latest)
+        if frame.index >= job['start']:
+            image = Image.fromarray(np.asarray(canvas.buffer_rgba())).convert('RGB')
+            image.save(os.path.join(job['directory'], FRAME_NAME % frame.index), compress_level=1)  # zlib dominates otherwise
+    return job['stop'] - job['start']
+
+
+def export_animation(spec, path, workers=None, fps=25, dpi=100, size=6.0):
+    """
+    Renders the cutting animation without a display, splitting the frames into
+    contiguous ranges over a process pool, and writes it to path: a GIF (with
+    pillow) or an MP4 (with a local ffmpeg) by extension, otherwise a PNG
+    sequence in the directory path. Returns the number of frames.
+    """
+    kind = os.path.splitext(path)[1].lower()
+    ffmpeg = shutil.which('ffmpeg')
+    if kind == '.mp4' and ffmpeg is None:
+        raise RuntimeError("MP4 export needs ffmpeg on the PATH; export a .gif or a PNG sequence instead")
+
+    total = spec['frame_count'] - 1
+    if total < 1:
+        raise RuntimeError("the animation needs a frame count of at least 2")
+    workers = workers or os.cpu_count() or 1
+    chunk = max(1, -(-total // (4 * workers)))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = tmp if kind in ('.gif', '.mp4') else path
+        os.makedirs(directory, exist_ok=True)
+        jobs = [{'spec': spec, 'start': start, 'stop': min(start + chunk, total), 'directory': directory, 'dpi': dpi, 'size': size}
+                for start in range(0, total, chunk)]
+        if workers == 1:
+            list(map(render_range, jobs))
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                list(pool.map(render_range, jobs))
+
+        frames = [os.path.join(directory, FRAME_NAME % i) for i in range(total)]
+        if kind == '.gif':
+            from PIL import Image
+            first = Image.open(frames[0])
+            first.save(path, save_all=True, append_images=(Image.open(frame) for frame in frames[1:]),
+                       duration=1000 / fps, loop=0)
+        elif kind == '.mp4':
+            subprocess.run([ffmpeg, '-y', '-loglevel', 'error', '-framerate', str(fps), '-i', os.path.join(directory, FRAME_NAME),
+                            '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2', '-pix_fmt', 'yuv420p', path], check=True)
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Animate the rack cutting of a gear, or export the animation without a display.")
+    parser.add_argument('-c', '--teeth-count', type=int, default=20, help="Number of teeth")
+    parser.add_argument('-m', '--module', type=float, default=2.0, help="Module (Defines size of the gear)")
+    parser.add_argument('-p', '--pressure-angle', type=float, default=20.0, help="Pressure angle in degrees")
+    parser.add_argument('-b', '--backlash', type=float, default=0.1, help="Backlash")
+    parser.add_argument('-x', '--profile-shift', type=float, default=0.0, help="Profile shift coefficient (x)")
+    parser.add_argument('-cf', '--clearance-factor', type=float, default=0.167, help="Clearance factor (default 0.167m)")
+    parser.add_argument('-n', '--frame-count', type=int, default=16, help="Number of frames for interpolation")
+    parser.add_argument('-o', '--output', default=None,
+                        help="Export instead of showing a window: a .gif or .mp4 file, or a directory for a PNG sequence")
+    parser.add_argument('-w', '--workers', type=int, default=None, help="Export: number of worker processes (default: CPU count)")
+    parser.add_argument('--fps', type=float, default=25.0, help="Export: frames per second of GIF/MP4 files")
+    parser.add_argument('--dpi', type=int, default=100, help="Export: resolution of the frames")
+    parser.add_argument('--size', type=float, default=6.0, help="Export: frame size in inches")
+    args = parser.parse_args(argv)
+
+    spec = cutting_spec(args)
+    if args.output is None:
+        show_animation(spec)
+        return 0
+
+    try:
+        count = export_animation(spec, args.output, args.workers, args.fps, args.dpi, args.size)
+    except RuntimeError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    print(f"Exported {count} frames to {os.path.abspath(args.output)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())